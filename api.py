@@ -0,0 +1,280 @@
+"""Headless JSON sizing API.
+
+Runs as its own process next to (or instead of) the Streamlit app and
+uses the same shared catalog and sizing rules::
+
+    python api.py --port 8502
+
+Endpoints:
+
+* ``GET  /health``     catalog version and pipe series, for readiness checks
+* ``POST /size``       ``{"flow_gpm": 100, "line_type": "Suction", "run_length_ft": 250, "fittings": {"90° elbow": 4}}``
+* ``POST /size/bulk``  ``{"lines": [{"line_id": "L1", "flow_gpm": 100, "line_type": "Return", "length_ft": 80}, ...]}``
+* ``GET  /metrics``    Prometheus text format; collected with ``PIPE_SIZING_METRICS=1``
+
+Both POST endpoints take optional ``"material"`` and ``"schedule"`` (e.g.
+``"HDPE"``, ``"SDR 11"``); the default is the workbook's PVC Schedule 40,
+and a material on its own gets its first schedule.
+"""
+import argparse
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import metrics
+from batch import size_line_list
+from catalog import CATALOG_PATH, CatalogError, get_catalog, get_library
+from hydraulics import FITTING_LD, REFERENCE_LENGTH_FT, friction_losses
+from sizing import STATUS_LABELS, catalog_breakpoints, normalize_line_type, size_lines
+
+DEFAULT_PORT = 8502
+
+# Upper bound on request bodies; a 10k-line bulk request is well under this
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+class RequestError(ValueError):
+    """Raised for malformed requests; reported to the client as HTTP 400."""
+
+
+def _flow(value):
+    try:
+        flow = float(value)
+    except (TypeError, ValueError):
+        raise RequestError('"flow_gpm" must be a number') from None
+    if not math.isfinite(flow) or flow < 0:
+        raise RequestError('"flow_gpm" must be a non-negative number')
+    return flow
+
+
+def _line_type(value):
+    line_type = normalize_line_type(value)
+    if line_type is None:
+        raise RequestError('"line_type" must be "Suction" or "Return"')
+    return line_type
+
+
+def _run_length(value):
+    try:
+        length = float(value)
+    except (TypeError, ValueError):
+        raise RequestError('"run_length_ft" must be a number') from None
+    if not math.isfinite(length) or length < 0:
+        raise RequestError('"run_length_ft" must be a non-negative number')
+    return length
+
+
+def _fittings(value):
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise RequestError('"fittings" must be an object of fitting name -> count')
+    unknown = sorted(set(value) - set(FITTING_LD))
+    if unknown:
+        raise RequestError(f'unknown fitting(s) {", ".join(unknown)}; expected one of {", ".join(FITTING_LD)}')
+    if not all(isinstance(count, int) and not isinstance(count, bool) and count >= 0 for count in value.values()):
+        raise RequestError('fitting counts must be non-negative integers')
+    return value
+
+
+def _series(payload):
+    """(material, schedule) requested in ``payload``; ``None`` picks a default (see :meth:`PipeLibrary.select`)."""
+    series = payload.get('material'), payload.get('schedule')
+    for name, value in zip(('material', 'schedule'), series):
+        if value is not None and not isinstance(value, str):
+            raise RequestError(f'"{name}" must be a string')
+    return series
+
+
+def size_single(catalog, payload):
+    """Size one flow against every catalog size, mirroring the single-line view."""
+    flow = _flow(payload.get('flow_gpm'))
+    line_type = _line_type(payload.get('line_type', 'Suction'))
+    run_length = _run_length(payload.get('run_length_ft', REFERENCE_LENGTH_FT))
+    fittings = _fittings(payload.get('fittings'))
+
+    breakpoints = catalog_breakpoints(catalog, line_type)
+    nominal = breakpoints.nominal_in
+    result = size_lines(flow, breakpoints.inner_in, line_type, nu=catalog.nu,
+                        gal_to_ft3=catalog.gal_to_ft3, sec_per_min=catalog.sec_per_min, pi=catalog.pi)
+    losses = friction_losses(result, run_length, fittings, roughness_ft=catalog.roughness_ft)
+    idx = int(breakpoints.recommend(flow))
+    metrics.incr('rows_sized', len(nominal))
+    return {
+        'flow_gpm': flow,
+        'line_type': line_type,
+        'material': catalog.material,
+        'schedule': catalog.schedule,
+        'design_limit': result.design_limit,
+        'line_limit': result.line_limit,
+        'recommended_size_in': float(nominal[idx]) if idx >= 0 else None,
+        'velocity_fps': float(result.velocity[idx]) if idx >= 0 else None,
+        'status': STATUS_LABELS[result.status[idx]] if idx >= 0 else 'None Available',
+        'run_length_ft': run_length,
+        'sizes': [
+            {'nominal_in': n, 'inner_in': d, 'velocity_fps': v, 'reynolds': re, 'status': STATUS_LABELS[s],
+             'friction_factor': f, 'head_loss_ft_per_100ft': h100, 'head_loss_ft': h}
+            for n, d, v, re, s, f, h100, h in zip(nominal.tolist(), result.inner_in.tolist(), result.velocity.tolist(),
+                                                  result.reynolds.tolist(), result.status.tolist(),
+                                                  losses.friction_factor.tolist(), losses.per_100ft.tolist(),
+                                                  losses.total.tolist())
+        ],
+    }
+
+
+def size_bulk(catalog, payload):
+    """Size a list of lines with the batch rules; one result per input line, in order."""
+    lines = payload.get('lines')
+    if not isinstance(lines, list):
+        raise RequestError('"lines" must be a list')
+    if not all(isinstance(line, dict) for line in lines):
+        raise RequestError('every entry in "lines" must be an object')
+
+    frame = pd.DataFrame({
+        'line_id': [str(line.get('line_id', i)) for i, line in enumerate(lines)],
+        'flow_gpm': pd.to_numeric(pd.Series([line.get('flow_gpm') for line in lines], dtype=object),
+                                  errors='coerce'),
+        'line_type': [normalize_line_type(line.get('line_type', 'Suction')) for line in lines],
+        'length_ft': pd.to_numeric(pd.Series([line.get('length_ft') for line in lines], dtype=object),
+                                   errors='coerce'),
+    })
+    results = size_line_list(frame, catalog)
+
+    def number(value):
+        return None if math.isnan(value) else value
+
+    return {'results': [
+        {'line_id': line_id,
+         'flow_gpm': number(flow),
+         'line_type': line_type if isinstance(line_type, str) else None,
+         'recommended_size_in': number(size),
+         'velocity_fps': number(vel),
+         'status': status,
+         'head_loss_ft_per_100ft': number(per_100ft),
+         'length_ft': number(length),
+         'head_loss_ft': number(loss)}
+        for line_id, flow, line_type, size, vel, status, per_100ft, length, loss in results.itertuples(index=False)
+    ]}
+
+
+ROUTES = {
+    '/size': size_single,
+    '/size/bulk': size_bulk,
+}
+
+
+class SizingHandler(BaseHTTPRequestHandler):
+    """JSON request handler; keeps connections alive for load generators."""
+    protocol_version = 'HTTP/1.1'
+    # Small JSON responses: don't let Nagle + delayed ACK add ~40 ms per request
+    disable_nagle_algorithm = True
+    server_version = 'PipeSizingAPI/1.0'
+    catalog_path = CATALOG_PATH
+    quiet = True
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            data = metrics.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path != '/health':
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+            return
+        library = get_library(self.catalog_path)
+        self._send_json(200, {'status': 'ok', 'catalog_version': library.version,
+                              'series': [{'material': m, 'schedule': s} for m, s in library.series()]})
+
+    def _content_length(self):
+        """The request's body length, or ``None`` after answering 411/400/413 for an unusable one."""
+        header = self.headers.get('Content-Length')
+        if header is None:
+            status, error = 411, 'Content-Length required'
+        elif not header.strip().isdigit():
+            status, error = 400, f'invalid Content-Length {header!r}'
+        elif int(header) > MAX_BODY_BYTES:
+            status, error = 413, 'request body too large'
+        else:
+            return int(header)
+        # The body can't be skipped reliably, so the connection can't be reused
+        self.close_connection = True
+        self._send_json(status, {'error': error})
+        return None
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        length = self._content_length()
+        if length is None:
+            return
+        body = self.rfile.read(length)
+        if handler is None:
+            self._send_json(404, {'error': f'unknown path {self.path}'})
+            return
+        try:
+            payload = json.loads(body or b'{}')
+            if not isinstance(payload, dict):
+                raise RequestError('request body must be a JSON object')
+            metrics.incr('requests')
+            with metrics.stage(self.path):
+                response = handler(get_catalog(self.catalog_path, *_series(payload)), payload)
+            self._send_json(200, response)
+        except (json.JSONDecodeError, RequestError, CatalogError) as exc:
+            self._send_json(400, {'error': str(exc)})
+        except Exception as exc:
+            metrics.incr('request_errors')
+            self.log_error('%s failed: %r', self.path, exc)
+            self._send_json(500, {'error': 'internal error'})
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def log_error(self, format, *args):
+        # Errors are logged even when per-request logging is off
+        super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=DEFAULT_PORT, catalog_path=CATALOG_PATH, quiet=True):
+    """Create (but do not start) a threaded API server."""
+    handler = type('Handler', (SizingHandler,), {'catalog_path': catalog_path, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the pipe sizing rules as a JSON API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--catalog', default=str(CATALOG_PATH), help='path to pipe_sizing.xlsx')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    metrics.register_cache('breakpoints', catalog_breakpoints)
+    # Parse the catalog up front so the first request doesn't pay for it
+    get_catalog(args.catalog)
+    server = make_server(args.host, args.port, args.catalog, quiet=not args.verbose)
+    print(f'Pipe sizing API listening on http://{args.host}:{server.server_port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
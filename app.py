@@ -1,16 +1,225 @@
+import math
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import altair as alt
-from openpyxl import load_workbook
-from io import BytesIO
 from pathlib import Path
-from PIL import Image
-import io
-import base64
-import traceback
+
+from assets import get_assets
+from catalog import CATALOG_PATH, CatalogError, get_library
+from coldstart import record_first_render
+from hydraulics import FITTING_LD, REFERENCE_LENGTH_FT
+import metrics
+from pump import EXAMPLE_PUMP_CURVE, PUMP_CURVE_COLUMNS, PumpCurveError, catalog_operating_points, read_pump_curve
+from render import DISPLAY_EXCLUDED_NOMINAL_IN, operating_point_chart, reynolds_sweep_chart, velocity_sweep_chart
+from results import sized_view, view_cache
+from sizing import LINE_TYPES, STATUS_COLORS, STATUS_LABELS, catalog_breakpoints, line_limits
+from sweep import catalog_flow_sweep
+
+# pandas, Altair and openpyxl are imported where they are used (chart, batch mode,
+# workbook parsing) so the first paint doesn't wait for them
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+metrics.register_cache('views', view_cache())
+metrics.register_cache('breakpoints', catalog_breakpoints)
+metrics.register_cache('operating_points', catalog_operating_points)
+metrics.register_cache('flow_sweeps', catalog_flow_sweep)
+
+def render_batch_mode(catalog):
+    """Size an uploaded CSV/XLSX line list and offer the results for download."""
+    st.subheader('Batch line list')
+    st.caption('Upload a CSV or XLSX with a line id, flow (gpm) and line type (Suction/Return) column, '
+               'and optionally a length (ft) column for the head loss over each run.')
+    uploaded = st.file_uploader('Line list', type=['csv', 'xlsx'])
+    if uploaded is None:
+        return
+
+    from batch import read_line_list, size_line_list, to_csv_bytes, to_xlsx_bytes
+
+    try:
+        lines = read_line_list(uploaded)
+    except ValueError as exc:
+        st.error(str(exc))
+        return
+    if lines.empty:
+        st.info('The uploaded line list has no rows.')
+        return
+
+    progress = st.progress(0.0, text=f'Sizing {len(lines)} lines...')
+    results = size_line_list(lines, catalog,
+                             progress=lambda done: progress.progress(done, text=f'Sizing {len(lines)} lines... {done:.0%}'))
+    progress.empty()
+
+    st.dataframe(results, hide_index=True)
+    invalid = int((results['Status'] == 'Invalid input').sum())
+    if invalid:
+        st.warning(f'{invalid} line(s) had a missing flow or a line type other than Suction/Return.')
+
+    stem = Path(uploaded.name).stem
+    csv_col, xlsx_col = st.columns([1, 1])
+    with csv_col:
+        st.download_button('Download CSV', data=to_csv_bytes(results),
+                           file_name=f'{stem}_sized.csv', mime='text/csv')
+    with xlsx_col:
+        st.download_button('Download XLSX', data=to_xlsx_bytes(results),
+                           file_name=f'{stem}_sized.xlsx',
+                           mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+def render_network_mode(catalog):
+    """Solve a looped or branched pool plumbing network and flag segments against the velocity limits."""
+    from network import NetworkError, PipeNetwork, example_pool_network, network_frames, network_from_frames
+
+    st.subheader('Pipe network')
+    st.caption('Nodes draw (+) or inject (−) a flow in gpm, or hold a fixed head such as the pool surface '
+               'at a drain, skimmer or return. Segments join two nodes with a catalog size; positive flow runs '
+               'From → To. Fittings are written like "2 x 90° elbow; 1 x Ball valve".')
+
+    # The tables start from an example system; edits live in the data editors' own state
+    if 'network_tables' not in st.session_state:
+        st.session_state['network_tables'] = network_frames(*example_pool_network())
+    node_frame, segment_frame = st.session_state['network_tables']
+    sizes = [float(n) for n in catalog.nominal_in.tolist()]
+    nodes_col, segments_col = st.columns([2, 5])
+    with nodes_col:
+        node_frame = st.data_editor(node_frame, num_rows='dynamic', hide_index=True, key='network-nodes')
+    with segments_col:
+        segment_frame = st.data_editor(
+            segment_frame, num_rows='dynamic', hide_index=True, key='network-segments',
+            column_config={
+                'Nominal (in)': st.column_config.SelectboxColumn(options=sizes, required=True),
+                'Line Type': st.column_config.SelectboxColumn(options=list(LINE_TYPES), required=True),
+            })
+
+    # Re-solve from the previous solution; a size change only recompiles that segment
+    previous = st.session_state.get('network_solution')
+    try:
+        nodes, segments = network_from_frames(node_frame, segment_frame)
+        with metrics.stage('network'):
+            if previous is not None and previous[0].catalog is catalog:
+                network = previous[0].update(nodes, segments)
+            else:
+                network = PipeNetwork(nodes, segments, catalog)
+            start = time.perf_counter()
+            solution = network.solve(initial=previous[1] if previous is not None else None)
+            solve_ms = (time.perf_counter() - start) * 1000
+    except NetworkError as exc:
+        st.error(str(exc))
+        return
+    st.session_state['network_solution'] = (network, solution)
+    metrics.incr('network_segments_solved', len(segments))
+
+    frame = solution.segments_frame(network)
+    if not solution.converged:
+        st.warning(f'The solver did not converge in {solution.iterations} iterations; results are approximate.')
+    flagged = frame[frame['Status'] != STATUS_LABELS[0]]
+    if len(flagged):
+        st.warning(f'{len(flagged)} segment(s) over the design velocity limit: ' + ', '.join(
+            f"{seg} ({status.lower()}, {abs(vel):.2f} ft/s)"
+            for seg, status, vel in zip(flagged['Segment'], flagged['Status'], flagged['Velocity (ft/s)'])))
+    else:
+        st.success('Every segment is within its design velocity limit.')
+
+    status_color = dict(zip(STATUS_LABELS, STATUS_COLORS))
+    st.dataframe(frame.style.map(lambda status: f'color: {status_color[status]}; font-weight: bold',
+                                 subset=['Status']),
+                 hide_index=True)
+    with st.expander('Node heads'):
+        st.dataframe(solution.nodes_frame(), hide_index=True)
+    st.caption(f'Solved {len(segments)} segments in {solution.iterations} iterations ({solve_ms:.1f} ms).')
+
+
+def render_flow_sweep(catalog, line_type, flow_gpm):
+    """Velocity (and optionally Reynolds number) against flow for every size, with the limit bands shaded."""
+    sweep_col, reynolds_col = st.columns([1, 1])
+    with sweep_col:
+        max_flow_gpm = st.number_input('Sweep up to (gpm)', value=400.0, min_value=1.0, step=50.0, key='sweep-max-flow')
+    with reynolds_col:
+        show_reynolds = st.checkbox('Show Reynolds number', key='sweep-reynolds')
+
+    # Computed on a fine grid and reduced to a few hundred points per size before charting
+    with metrics.stage('flow_sweep'):
+        sweep = catalog_flow_sweep(catalog, line_type, float(max_flow_gpm))
+        shown_flow = flow_gpm if flow_gpm <= max_flow_gpm else None
+        st.altair_chart(velocity_sweep_chart(sweep, shown_flow), use_container_width=True)
+        if show_reynolds:
+            st.altair_chart(reynolds_sweep_chart(sweep, shown_flow), use_container_width=True)
+    st.caption(f'{sweep.points_computed:,} points computed, {sweep.flow_gpm.shape[0]} plotted per size. Shaded: acceptable '
+               f'up to {sweep.design_limit:g} ft/s, above design limit up to {sweep.line_limit:g} ft/s, '
+               'unacceptable beyond. The dashed line is the flow above.')
+
+
+def render_pump_curve(catalog, line_type, run_length_ft, fittings, recommended_size):
+    """Where a pump curve meets each size's system curve for this run, with the operating points charted."""
+    import pandas as pd
+
+    st.caption('The system curve of each size is the static head plus the friction loss over the run and '
+               'fittings above. Where it crosses the pump curve is the flow the pump will actually deliver.')
+    with st.expander('Pump curve'):
+        uploaded = st.file_uploader('Pump curve (CSV/XLSX with flow in gpm and head in ft)', type=['csv', 'xlsx'],
+                                    key='pump-curve-file')
+        points = EXAMPLE_PUMP_CURVE
+        if uploaded is not None:
+            try:
+                points = read_pump_curve(uploaded)
+            except (PumpCurveError, ValueError) as exc:
+                st.error(f'Could not read the pump curve: {exc}')
+        # A new upload starts a fresh editor; otherwise edits live in the editor's own state
+        curve_frame = st.data_editor(pd.DataFrame(points, columns=PUMP_CURVE_COLUMNS), num_rows='dynamic',
+                                     hide_index=True, key=f'pump-curve-{uploaded.name if uploaded else "example"}')
+        static_head_ft = st.number_input('Static head (ft)', value=0.0, step=1.0, key='pump-static-head',
+                                         help='Elevation and pressure the pump must overcome at zero flow')
+
+    # Blank editor rows come back as NaN, which never equals itself and would miss the cache on every rerun
+    curve = curve_frame[PUMP_CURVE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    points = tuple((float(q), float(h)) for q, h in curve.itertuples(index=False)
+                   if math.isfinite(q) and math.isfinite(h))
+    fittings = tuple(sorted((name, count) for name, count in fittings.items() if count))
+    try:
+        with metrics.stage('pump_curve'):
+            operating = catalog_operating_points(catalog, line_type, points, float(static_head_ft),
+                                                 float(run_length_ft), fittings)
+            chart = operating_point_chart(operating, recommended_size)
+    except PumpCurveError as exc:
+        st.error(str(exc))
+        return
+    st.altair_chart(chart, use_container_width=True)
+
+    frame = operating.frame()
+    frame = frame[~frame['Nominal (in)'].isin(DISPLAY_EXCLUDED_NOMINAL_IN)]
+    status_color = dict(zip(STATUS_LABELS, STATUS_COLORS))
+    st.dataframe(frame.style.format({'Flow (gpm)': '{:.1f}', 'Head (ft)': '{:.1f}', 'Velocity (ft/s)': '{:.2f}'},
+                                    na_rep='—')
+                 .map(lambda status: f'color: {status_color.get(status, "#03263a")}; font-weight: bold',
+                      subset=['Status']),
+                 hide_index=True)
+    st.caption('Dashed: pump curve. Points: operating point per size, coloured by velocity status; the '
+               'recommended size is drawn heavier. A size whose system curve stays under the pump curve runs '
+               'out at the last point of the curve.')
+
+
+def render_debug_panel():
+    """Per-stage timings, counters and cache stats; shown with ``?debug=1`` in the URL."""
+    with st.expander('Debug: timings and counters', expanded=True):
+        if not metrics.enabled():
+            st.caption('Metrics are off. Start the app with PIPE_SIZING_METRICS=1 to collect them.')
+            return
+        snap = metrics.snapshot()
+        if snap['recent']:
+            st.write('Last rerun (ms):', {name: round(seconds * 1000, 2) for name, seconds in snap['recent'][-1][1].items()})
+        st.json({
+            'stages_ms': {name: {'count': s['count'], 'mean': round(s['total_s'] / s['count'] * 1000, 2),
+                                 'max': round(s['max_s'] * 1000, 2)}
+                          for name, s in snap['stages'].items()},
+            'counters': snap['counters'],
+            'caches': snap['caches'],
+        })
+
 
 def main():
-    st.set_page_config(page_title='PVC Pipe Sizing Explorer', layout='wide')
+    render_start = time.perf_counter()
+    st.set_page_config(page_title='Pipe Sizing Explorer', layout='wide')
 
     # Hide Streamlit footer and toolbar
     st.markdown("""
@@ -64,104 +273,87 @@ def main():
 
 
 
-    # Custom font loading
-    @st.cache_data
-    def load_custom_font():
-        """Load custom font from file"""
-        import pathlib
-        
-        app_dir = pathlib.Path(__file__).parent.absolute()
-        font_path = app_dir / 'Frank the Architect.TTF'
-        
-        if font_path.exists():
-            with open(font_path, "rb") as f:
-                font_data = f.read()
-            return base64.b64encode(font_data).decode()
-        return None
-
-    # Header with optional logo (mobile-friendly layout)
-    workspace_logo = None
-    app_dir = Path(__file__).parent
-    # Look for JBDG logo first
-    jbdg_logo = app_dir / 'JBDG Logo-2.jpg'
-    if jbdg_logo.exists():
-        workspace_logo = str(jbdg_logo)
-    else:
-        # Fallback to other logo files
-        for ext in ('png', 'jpg', 'jpeg'):
-            logo_path = app_dir / f'logo.{ext}'
-            if logo_path.exists():
-                workspace_logo = str(logo_path)
-                break
-    
+    # Font and logo are prepared once per process and served from ./static
+    assets = get_assets()
+
+    # Inject FrankTheArchitect font CSS for all text - improved light/dark mode support
+    font_css_block = (f"@font-face {{ font-family: 'FrankTheArchitect'; src: url('{assets.font_url}') format('truetype'); font-display: swap; }}"
+                      if assets.font_url else
+                      "@font-face { font-family: 'FrankTheArchitect'; src: local('FrankTheArchitect'), local('Architect'); }")
+    st.markdown(f"""
+    <style>
+    {font_css_block}
+    html, body, [class*="css"], .stApp, .stMarkdown, h1, h2, h3, h4, h5, h6, p, div, span {{ 
+        font-family: FrankTheArchitect, 'Architect', monospace !important; 
+    }}
+    .kpi-badge {{
+        display:inline-block; padding:8px 14px; border-radius:8px; color: white; font-weight:700; font-size:20px; font-family: FrankTheArchitect, monospace;
+    }}
+    .logo-accent {{ background: linear-gradient(90deg, #0b82bf, rgba(255,255,255,0.13)); padding:6px; border-radius:8px }}
+    </style>
+    """, unsafe_allow_html=True)
+
     # Show logo first (appears above title on mobile)
-    if workspace_logo:
+    if assets.logo_url:
         col_logo_mobile, col_spacer = st.columns([1, 2])
         with col_logo_mobile:
-            st.image(workspace_logo, width=200)
+            st.markdown(f'<img src="{assets.logo_url}" class="logo-right" width="200" alt="Logo">',
+                        unsafe_allow_html=True)
     
-    # Title below logo (better for mobile)
-    st.title('PVC Pipe Sizing')
+    # Title below logo (better for mobile); named after the material once it's chosen
+    title = st.empty()
+    title.title('Pipe Sizing')
 
-    # Load workbook from the app directory FIRST
-    excel_path = Path(__file__).parent / 'pipe_sizing.xlsx'
+    # Load the shared pipe catalog (parsed once per workbook version, not per rerun)
     try:
-        with open(excel_path, 'rb') as f:
-            wb_bytes = f.read()
+        with metrics.stage('catalog'):
+            library = get_library(CATALOG_PATH)
     except FileNotFoundError:
-        st.error(f'`pipe_sizing.xlsx` not found at {excel_path}. Please ensure the file exists in the same directory as this app.')
+        st.error(f'`pipe_sizing.xlsx` not found at {CATALOG_PATH}. Please ensure the file exists in the same directory as this app.')
+        return
+    except CatalogError as exc:
+        st.error(str(exc))
+        return
+
+    # Every series is a slice of the shared library; switching is an index lookup
+    material_col, schedule_col = st.columns([1, 1])
+    with material_col:
+        material = st.selectbox('Material', options=library.materials,
+                                index=library.materials.index(library.base.material), key='pipe-material')
+    with schedule_col:
+        schedules = library.schedules_for(material)
+        schedule = st.selectbox('Schedule', options=schedules,
+                                index=schedules.index(library.base.schedule) if library.base.schedule in schedules else 0,
+                                key=f'pipe-schedule-{material}')
+    catalog = library.select(material, schedule)
+    title.title(f'{material} Pipe Sizing')
+
+    # Batch mode sizes an uploaded line list instead of a single flow
+    mode = st.radio('Mode', options=['Single line', 'Batch line list', 'Pipe network'], horizontal=True)
+    if mode == 'Batch line list':
+        render_batch_mode(catalog)
+        return
+    if mode == 'Pipe network':
+        render_network_mode(catalog)
         return
 
-    # Load workbook (formulas and values)
-    wb = load_workbook(filename=BytesIO(wb_bytes), data_only=False)
-    wb_vals = load_workbook(filename=BytesIO(wb_bytes), data_only=True)
-
-    # Use the first sheet automatically (no display needed)
-    sheet = wb.sheetnames[0]
-    ws = wb[sheet]
-    ws_vals = wb_vals[sheet]
-
-    def find_label_row(label_text_prefix):
-        """Find a row index where column A starts with label_text_prefix (case-insensitive)."""
-        for r in range(1, ws.max_row + 1):
-            v = ws.cell(row=r, column=1).value
-            if isinstance(v, str) and v.strip().lower().startswith(label_text_prefix.lower()):
-                return r
-        return None
-
-    # Read inputs by label (robust to small layout shifts)
-    flow_row = find_label_row('Flow Rate')
-    line_type_row = find_label_row('Line Type')
-    nu_row = find_label_row('Water')
-
-    # fallback row numbers if detection fails (based on current workbook)
-    if flow_row is None:
-        flow_row = 5
-    if line_type_row is None:
-        line_type_row = 6
-    if nu_row is None:
-        nu_row = 8
-
-    def get_cell_value(r, c):
-        return ws_vals.cell(row=r, column=c).value
-
-    flow_gpm = get_cell_value(flow_row, 2) or 100.0
-    line_type = get_cell_value(line_type_row, 2) or 'Suction'
-
-    # Find constants by scanning the sheet for known labels in column D/E
-    constants = {}
-    for r in range(1, ws.max_row + 1):
-        label = ws.cell(row=r, column=4).value  # column D often contains constant labels
-        val = ws_vals.cell(row=r, column=5).value  # column E often contains the numeric value
-        if isinstance(label, str):
-            constants[label.strip()] = val
-
-    gal_to_ft3 = constants.get('gal_to_ft^3', 0.133681)
-    sec_per_min = constants.get('sec_per_min', 60.0)
-    pi = constants.get('π', 3.141592653589793)
-
-    # kinematic viscosity is often in column B of its label row
-    nu = get_cell_value(nu_row, 2) or 1.1e-05
+    # Only this part reruns when the flow or line type changes; the chrome above is sent once
+    single_line_fragment(catalog)
+
+    # Export button only shown when we have data
+    # removed CSV download as requested
+
+    st.caption('Notes: thresholds and constants were read from the workbook where possible. Adjust inputs in the sidebar to recalculate.')
+
+    # Logged once per process: how long the cold start spent importing vs rendering
+    record_first_render(_IMPORT_SECONDS, time.perf_counter() - render_start)
+
+
+def render_single_line(catalog):
+    """Inputs, pipe table, recommendation, velocity and head loss charts for one flow."""
+    flow_gpm = catalog.flow_gpm
+    line_type = catalog.line_type
+    nu = catalog.nu
 
     # NOW SHOW INPUTS SECTION
     st.subheader('Inputs')
@@ -179,173 +371,40 @@ def main():
                                 help='Choose Suction or Return')
     
     st.write(f'Water ν (ft²/s): {nu}')
-    
-    # Set design limits based on line type (hardcoded - no user input needed)
-    if line_type == 'Suction':
-        design_limit = 4.5
-        line_limit = 6.0
-    else:  # Return (previously Discharge)
-        design_limit = 6.0
-        line_limit = 8.0
-
-    # Load frankthearchitect font from the app directory
-    embedded_font_css = None
-    try:
-        frank_path = Path(__file__).parent / 'Frank the Architect.TTF'
-        if frank_path.exists():
-            with open(frank_path, 'rb') as f:
-                font_bytes = f.read()
-            font_b64 = base64.b64encode(font_bytes).decode('utf-8')
-            embedded_font_css = f"@font-face {{ font-family: 'FrankTheArchitect'; src: url('data:font/truetype;base64,{font_b64}') format('truetype'); }}"
-    except Exception:
-        pass
-
-    # Use default logo color
-    logo_color = '#0b82bf'
-
-
-
-    # Inject FrankTheArchitect font CSS for all text - improved light/dark mode support
-    font_css_block = embedded_font_css or "@font-face { font-family: 'FrankTheArchitect'; src: local('FrankTheArchitect'), local('Architect'); }"
-    st.markdown(f"""
-    <style>
-    {font_css_block}
-    html, body, [class*="css"], .stApp, .stMarkdown, h1, h2, h3, h4, h5, h6, p, div, span {{ 
-        font-family: FrankTheArchitect, 'Architect', monospace !important; 
-    }}
-    .kpi-badge {{
-        display:inline-block; padding:8px 14px; border-radius:8px; color: white; font-weight:700; font-size:20px; font-family: FrankTheArchitect, monospace;
-    }}
-    .logo-accent {{ background: linear-gradient(90deg, #0b82bf, rgba(255,255,255,0.13)); padding:6px; border-radius:8px }}
-    </style>
-    """, unsafe_allow_html=True)
 
+    # Run length and fittings for the friction loss columns
+    run_length_ft = st.number_input('Run length (ft)', value=REFERENCE_LENGTH_FT, min_value=0.0, step=10.0,
+                                    help='Straight pipe on this line; fittings below are added as equivalent length')
+    fittings = {}
+    with st.expander('Fittings on the run'):
+        fitting_cols = st.columns(4)
+        for i, name in enumerate(FITTING_LD):
+            with fitting_cols[i % 4]:
+                fittings[name] = st.number_input(name, value=0, min_value=0, step=1, key=f'fitting-{name}')
     
+    # Set design limits based on line type (hardcoded - no user input needed)
+    design_limit, line_limit = line_limits(line_type)
 
+    # Sizing, friction loss, recommendation, table and charts for this (catalog, flow, line
+    # type, run) are computed once per process and shared across sessions; repeats are a lookup
+    with metrics.stage('sizing'):
+        view = sized_view(catalog, flow_gpm, line_type, run_length_ft, fittings)
+    result = view.result
+    metrics.incr('rows_sized', len(result.velocity))
 
-
-    # Locate the pipe size table by finding the header row that starts with 'Nominal Size'
-    table_header_row = None
-    for r in range(1, ws.max_row + 1):
-        v = ws.cell(row=r, column=1).value
-        if isinstance(v, str) and v.strip().lower().startswith('nominal size'):
-            table_header_row = r
-            break
-
-    if table_header_row is None:
-        st.error('Could not find the pipe size table header in the sheet. Ensure the header starts with "Nominal Size" in column A.')
-        return
-
-    # Read table rows until first blank nominal size
-    rows = []
-    r = table_header_row + 1
-    while r <= ws.max_row:
-        nominal = ws_vals.cell(row=r, column=1).value
-        if nominal is None:
-            break
-        inner_d = ws_vals.cell(row=r, column=2).value
-        rows.append({'nominal_in': nominal, 'inner_in': inner_d, 'row': r})
-        r += 1
-
-    if not rows:
-        st.error('No pipe sizes found under the table header.')
-        return
-
-    # Compute derived values
-    data = []
-    for item in rows:
-        D_in = float(item['inner_in'])
-        nominal_size = float(item['nominal_in'])
-        
-        # FORCE SKIP 1 INCH PIPE - only process if >= 1.5 inches
-        if nominal_size < 1.5:
-            continue
-            
-        area_ft2 = (pi * (D_in / 12) ** 2) / 4
-        velocity = (flow_gpm * gal_to_ft3 / sec_per_min) / area_ft2
-        # status using thresholds
-        status_suction = 'Acceptable' if velocity <= design_limit else ('Above design limit' if velocity <= line_limit else 'Unacceptable')
-        status_return = 'Acceptable' if velocity <= design_limit else ('Above design limit' if velocity <= line_limit else 'Unacceptable')
-        # Reynolds number: Re = V * D(ft) / nu
-        Re = velocity * (D_in / 12) / nu
-        data.append({'Nominal (in)': nominal_size,
-                     'Inner D (in)': D_in,
-                     'Area (ft^2)': area_ft2,
-                     'Velocity (ft/s)': velocity,
-                     'Suction Status': status_suction,
-                     'Return Status': status_return,
-                     'Reynolds': Re,
-                     'row': item['row']})
-
-    df = pd.DataFrame(data)
-
-    # Choose which status column to display based on line type
-    status_col = 'Suction Status' if line_type == 'Suction' else 'Return Status'
-    df['Status'] = df[status_col]
-
-    # Determine recommended size using the chosen line_limit
+    # Recommended size using the chosen line_limit: the first (smallest) acceptable size
     active_limit = float(line_limit)
-    recommended_df = df[df['Velocity (ft/s)'] <= active_limit]
-    recommended_size = None
-    recommended_velocity = None
-    if not recommended_df.empty:
-        # Get the first (smallest) acceptable size
-        first_acceptable = recommended_df.iloc[0]
-        recommended_size = first_acceptable['Nominal (in)']
-        recommended_velocity = first_acceptable['Velocity (ft/s)']
+    recommended_idx = view.recommended_idx
+    recommended_size = view.recommended_size
+    recommended_velocity = view.recommended_velocity
 
     st.subheader('Computed pipe table')
 
-    # Use AgGrid for nicer interactive table with conditional text coloring
     # Create ABSOLUTE MINIMALIST table - just pipe size and velocity!
-    display_df = df[['Nominal (in)', 'Velocity (ft/s)']].copy()
-    # Round velocity to 2 decimal places for cleaner display
-    display_df['Velocity (ft/s)'] = display_df['Velocity (ft/s)'].round(2)
-    
-    # RESTART WITH NEW COLUMN NAMES TO BREAK CACHING
-    display_df = display_df.rename(columns={
-        'Nominal (in)': 'Nominal Pipe Size (in)',
-        'Velocity (ft/s)': 'Velocity of water (ft/s)'
-    })
-    
-    # FILTER OUT 12 INCH PIPE - we don't need it!
-    display_df = display_df[display_df['Nominal Pipe Size (in)'] != 12.0]
-    
-    # Build the table using fixed colors
-    html_table = """
-    <div style="display: flex; justify-content: center; margin: 20px 0;">
-        <table style="border-collapse: collapse; width: 90%; max-width: 700px; font-family: 'FrankTheArchitect', monospace; font-size: 18px; background-color: #fbfcff; border-radius: 12px; overflow: hidden; box-shadow: 0 6px 12px rgba(11, 130, 191, 0.15); border: 1px solid #d6e9ff;">
-            <thead>
-                <tr style="background: linear-gradient(135deg, #0b82bf 0%, #1e90ff 100%); color: #ffffff;">
-                    <th style="padding: 18px 20px; text-align: center; font-weight: bold; border: none; font-size: 16px;">Nominal Pipe Size (in)</th>
-                    <th style="padding: 18px 20px; text-align: center; font-weight: bold; border: none; font-size: 16px;">Velocity of water (ft/s)</th>
-                </tr>
-            </thead>
-            <tbody>
-    """
-    
-    # Add each row with color coding
-    for _, row in display_df.iterrows():
-        velocity = row['Velocity of water (ft/s)']
-        
-        # Color code the velocity
-        if velocity > line_limit:
-            color = '#d62728'  # Red
-        elif velocity > design_limit:
-            color = '#ff7f0e'  # Orange
-        else:
-            color = '#2ca02c'  # Green
-            
-        html_table += f'<tr style="border-bottom: 1px solid #e6f3ff; background-color: {"#f8fbff" if len([x for x in display_df.iterrows()][:display_df.index.get_loc(row.name) + 1]) % 2 == 0 else "#fbfcff"};"><td style="padding: 14px 20px; text-align: center; font-weight: bold; border: none; color: #03263a;">{row["Nominal Pipe Size (in)"]}</td><td style="padding: 14px 20px; text-align: center; font-weight: bold; color: {color}; border: none;">{velocity}</td></tr>'
-    
-    html_table += """
-            </tbody>
-        </table>
-    </div>
-    """
-    
-    # Try using st.write instead of st.markdown
-    st.write(html_table, unsafe_allow_html=True)
+    # Rendered in one pass from the velocity array and memoized per (catalog, flow, line type)
+    with metrics.stage('table'):
+        # Try using st.write instead of st.markdown
+        st.write(view.table_html, unsafe_allow_html=True)
     
     # Show recommended size badge with color (green/yellow/red) and include 'in'
     def badge_for_velocity(vel):
@@ -355,12 +414,14 @@ def main():
             return ('#ff7f0e', 'Above design limit')
         return ('#d62728', 'Unacceptable')
 
-    # Choose a representative velocity for the badge
-    try:
-        vel_candidates = df.loc[df['Velocity (ft/s)'] <= active_limit, 'Velocity (ft/s)']
-        vel_for_badge = float(vel_candidates.min()) if not vel_candidates.empty else float(df['Velocity (ft/s)'].max())
-    except Exception:
-        vel_for_badge = float(df['Velocity (ft/s)'].max()) if not df.empty else 0.0
+    # Choose a representative velocity for the badge: the smallest velocity that meets the
+    # active_limit (the overall minimum whenever any size qualifies), or the overall max
+    if len(result.velocity) == 0:
+        vel_for_badge = 0.0
+    elif recommended_idx >= 0:
+        vel_for_badge = float(result.velocity.min())
+    else:
+        vel_for_badge = float(result.velocity.max())
     badge_color, badge_label = badge_for_velocity(vel_for_badge)
     
     # CENTERED RECOMMENDATION UNDER TABLE - FIXED COLORS!
@@ -372,22 +433,9 @@ def main():
         <div style='margin-bottom: 8px; font-size: 18px; font-weight: bold; color: #0b82bf;'>Recommended Pipe Size</div>
         {f'<div style="font-size: 24px; font-weight: bold; color: {badge_color}; margin: 8px 0;">{recommended_size} in</div>' if recommended_size else '<div style="font-size: 24px; font-weight: bold; color: #d62728; margin: 8px 0;">None Available</div>'}
         {f'<div style="font-size: 16px; color: {badge_color}; font-weight: bold;">Velocity: {recommended_velocity:.2f} ft/s</div>' if recommended_velocity else ''}
+        {f'<div style="font-size: 15px; color: #03263a; margin-top: 6px;">Head loss: {view.losses.per_100ft[recommended_idx]:.2f} ft/100 ft &nbsp;•&nbsp; {view.losses.total[recommended_idx]:.2f} ft over the run</div>' if recommended_idx >= 0 else ''}
     </div>
     """, unsafe_allow_html=True)
-    def badge_for_velocity(vel):
-        if vel <= design_limit:
-            return ('#2ca02c', 'Acceptable')
-        if vel <= line_limit:
-            return ('#ff7f0e', 'Above design limit')
-        return ('#d62728', 'Unacceptable')
-
-    # Choose a representative velocity for the badge: the smallest velocity that meets the active_limit,
-    # or the overall max if none meet the limit. This is clearer than the previous one-liner.
-    try:
-        vel_candidates = df.loc[df['Velocity (ft/s)'] <= active_limit, 'Velocity (ft/s)']
-        vel_for_badge = float(vel_candidates.min()) if not vel_candidates.empty else float(df['Velocity (ft/s)'].max())
-    except Exception:
-        vel_for_badge = float(df['Velocity (ft/s)'].max()) if not df.empty else 0.0
     # Status text centered under the table with background box - FIXED COLORS!
     st.markdown(f"""
     <div style='width: 100%; text-align: center; margin: 25px auto; padding: 16px; 
@@ -410,86 +458,71 @@ def main():
 
     # Diagram / chart of velocities vs size (improved visuals)
     st.subheader('Velocity vs Pipe Size')
-    # Build the chart robustly: convert and sort data, handle empty cases, and catch Altair errors
-    if df.empty:
-        st.info('No pipe sizes available to chart.')
-    else:
-        try:
-            # Ensure numeric velocity and nominal ordering
-            df['Velocity (ft/s)'] = pd.to_numeric(df['Velocity (ft/s)'], errors='coerce')
-            # sanitize infinite values (avoid chained-assignment inplace warning)
-            df['Velocity (ft/s)'] = df['Velocity (ft/s)'].replace([float('inf'), float('-inf')], pd.NA)
 
-            # keep nominal as string for category axis but sort by numeric value properly
-            try:
-                df['_nominal_sort'] = pd.to_numeric(df['Nominal (in)'], errors='coerce')
-                # Sort dataframe by nominal size for proper chart ordering
-                df = df.sort_values('_nominal_sort').reset_index(drop=True)
-            except Exception:
-                df['_nominal_sort'] = range(len(df))
-            df['_nominal_label'] = df['Nominal (in)'].astype(str)
-
-            # drop rows without numeric velocities before charting
-            chart_df = df.dropna(subset=['Velocity (ft/s)']).copy()
-            # FILTER OUT 12 INCH PIPE FROM CHART TOO!
-            chart_df = chart_df[chart_df['Nominal (in)'] != 12.0]
-            
-            if chart_df.empty:
-                st.info('No valid numeric velocities to chart after cleaning the data. See Chart debug below for computed values.')
-                with st.expander('Chart debug — computed velocities', expanded=True):
-                    # show computed velocities and source fields so user can see why chart is empty
-                    try:
-                        display_df = df[['Nominal (in)', 'Inner D (in)', 'Velocity (ft/s)']].copy()
-                        display_df['Velocity (ft/s)'] = display_df['Velocity (ft/s)'].map(lambda v: f"{v:.6f}" if pd.notna(v) else 'NaN')
-                        st.table(display_df)
-                    except Exception:
-                        st.write(df.head(20).to_dict(orient='records'))
-            else:
-                # Create color-coded bar chart based on status
+    with metrics.stage('chart'):
+        # The chart comes built from the shared view; its frames are only rebuilt for the fallbacks
+
+        # Build the chart robustly: handle empty cases and catch Altair errors
+        if len(view.nominal_in) == 0:
+            st.info('No pipe sizes available to chart.')
+        elif view.chart_rows < 0:
+            st.error('Could not render chart.')
+        elif view.chart_rows == 0:
+            st.info('No valid numeric velocities to chart after cleaning the data. See Chart debug below for computed values.')
+            with st.expander('Chart debug — computed velocities', expanded=True):
+                # show computed velocities and source fields so user can see why chart is empty
+                df = view.frames()[0]
                 try:
-                    # Sort chart data by nominal size
-                    chart_df = chart_df.sort_values('_nominal_sort').reset_index(drop=True)
-                    
-                    # Add colors based on velocity status
-                    chart_df['Color'] = chart_df['Velocity (ft/s)'].apply(
-                        lambda v: '#2ca02c' if v <= design_limit else ('#ff7f0e' if v <= line_limit else '#d62728')
-                    )
-                    
-                    # Create chart data with colors
-                    chart_data = pd.DataFrame({
-                        'Pipe Size': chart_df['_nominal_label'],
-                        'Velocity': chart_df['Velocity (ft/s)'],
-                        'Color': chart_df['Color'],
-                        'Sort Order': chart_df['_nominal_sort']
-                    })
-                    
-                    # Use Altair for color-coded bars with proper sorting
-                    chart = alt.Chart(chart_data).mark_bar().encode(
-                        x=alt.X('Pipe Size:N', title='Nominal Size (in)', sort=alt.EncodingSortField(field='Sort Order', op='mean')),
-                        y=alt.Y('Velocity:Q', title='Velocity (ft/s)'),
-                        color=alt.Color('Color:N', scale=None)
-                    ).properties(height=360)
-                    
-                    st.altair_chart(chart, use_container_width=True)
-                    
-                    # Add limit line info below chart
-                    st.caption(f'🟢 Green: ≤ {design_limit} ft/s (Acceptable)  |  🟡 Yellow: ≤ {line_limit} ft/s (Above design)  |  🔴 Red: > {line_limit} ft/s (Unacceptable)')
-                    altair_ok = True
+                    import pandas as pd
+
+                    display_df = df[['Nominal (in)', 'Inner D (in)', 'Velocity (ft/s)']].copy()
+                    display_df['Velocity (ft/s)'] = display_df['Velocity (ft/s)'].map(lambda v: f"{v:.6f}" if pd.notna(v) else 'NaN')
+                    st.table(display_df)
                 except Exception:
-                    # Fallback to simple bar chart
-                    chart_data = chart_df.sort_values('_nominal_sort').set_index('_nominal_label')['Velocity (ft/s)']
-                    st.bar_chart(chart_data)
-                    st.caption(f'Horizontal reference: {active_limit} ft/s limit')
-                    altair_ok = True                # Chart rendered successfully - no additional stats needed
-        except Exception:
-            st.error('Could not render chart.')
+                    st.write(df.head(20).to_dict(orient='records'))
+        else:
+            # Color-coded Altair bars with proper sorting; view.chart is None if it could not be built
+            try:
+                st.altair_chart(view.chart, use_container_width=True)
 
-    # Export button only shown when we have data
-    # removed CSV download as requested
+                # Add limit line info below chart
+                st.caption(f'🟢 Green: ≤ {design_limit} ft/s (Acceptable)  |  🟡 Yellow: ≤ {line_limit} ft/s (Above design)  |  🔴 Red: > {line_limit} ft/s (Unacceptable)')
+            except Exception:
+                # Fallback to simple bar chart
+                chart_df = view.frames()[1]
+                chart_data = chart_df.set_index('_nominal_label')['Velocity (ft/s)']
+                st.bar_chart(chart_data)
+                st.caption(f'Horizontal reference: {active_limit} ft/s limit')
 
-    st.caption('Notes: thresholds and constants were read from the workbook where possible. Adjust inputs in the sidebar to recalculate.')
+    st.subheader('Velocity vs Flow')
+    render_flow_sweep(catalog, line_type, flow_gpm)
+
+    if view.head_loss_chart is not None:
+        st.subheader('Head Loss vs Pipe Size')
+        with metrics.stage('head_loss_chart'):
+            st.altair_chart(view.head_loss_chart, use_container_width=True)
+            equivalent_ft = ', '.join(f'{n} in: {ft:.1f} ft' for n, ft in
+                                      zip(view.nominal_in.tolist(), view.losses.equivalent_length_ft.tolist())
+                                      if n not in DISPLAY_EXCLUDED_NOMINAL_IN)
+            st.caption(f'Darcy-Weisbach with Colebrook-White friction factors over {run_length_ft:g} ft of pipe'
+                       + (f' plus fittings ({equivalent_ft} equivalent length).' if any(fittings.values()) else '.'))
+
+    st.subheader('Pump vs System Curve')
+    render_pump_curve(catalog, line_type, run_length_ft, fittings, recommended_size)
+
+    if st.query_params.get('debug') == '1':
+        render_debug_panel()
+
+
+@st.fragment
+def single_line_fragment(catalog):
+    """:func:`render_single_line` as a fragment: changing an input reruns just this part."""
+    with metrics.rerun('fragment_reruns'):
+        render_single_line(catalog)
 
 
 if __name__ == '__main__':
-    main()
+    metrics.maybe_start_server()
+    with metrics.rerun():
+        main()
 
@@ -0,0 +1,127 @@
+"""Static assets (font and logo) served by Streamlit's static file server.
+
+The font and a right-sized logo are written once into ``static/`` under
+content-hashed names, so the browser can keep them cached indefinitely
+and pages only reference them by URL instead of re-sending their bytes
+on every rerun. Run ``python assets.py`` at build time to prepare them
+ahead of the first request; the app also prepares them on startup if
+they are missing.
+"""
+import functools
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+APP_DIR = Path(__file__).parent
+STATIC_DIR = APP_DIR / 'static'
+# Streamlit serves ./static/<name> at app/static/<name> (server.enableStaticServing)
+STATIC_URL = 'app/static'
+
+FONT_SOURCE = APP_DIR / 'Frank the Architect.TTF'
+LOGO_SOURCES = [APP_DIR / 'JBDG Logo-2.jpg'] + [APP_DIR / f'logo.{ext}' for ext in ('png', 'jpg', 'jpeg')]
+
+# The logo is displayed 200 px wide; 2x covers high-density screens
+LOGO_WIDTH_PX = 400
+
+
+@dataclass(frozen=True)
+class Assets:
+    """URLs of the prepared assets; ``None`` when the source file is missing."""
+    font_url: str = None
+    logo_url: str = None
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _publish(name, suffix, data):
+    """Write ``data`` to ``static/`` under a content-hashed name and return its URL."""
+    filename = f'{name}.{_digest(data)}{suffix}'
+    target = STATIC_DIR / filename
+    if not target.exists():
+        STATIC_DIR.mkdir(exist_ok=True)
+        tmp = target.with_suffix(target.suffix + '.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(target)
+    return f'{STATIC_URL}/{filename}'
+
+
+def _resized_logo(path):
+    """Return the logo scaled down to ``LOGO_WIDTH_PX`` as JPEG/PNG bytes."""
+    from io import BytesIO
+
+    from PIL import Image
+
+    with Image.open(path) as img:
+        fmt = 'PNG' if img.mode in ('RGBA', 'LA', 'P') else 'JPEG'
+        if img.width > LOGO_WIDTH_PX:
+            img = img.resize((LOGO_WIDTH_PX, round(img.height * LOGO_WIDTH_PX / img.width)),
+                             Image.LANCZOS)
+        buffer = BytesIO()
+        if fmt == 'JPEG':
+            img.convert('RGB').save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        else:
+            img.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue(), '.png' if fmt == 'PNG' else '.jpg'
+
+
+MANIFEST_PATH = STATIC_DIR / 'manifest.json'
+
+
+def build_assets():
+    """Prepare the font and logo in ``static/``, record them in the manifest and return their URLs."""
+    font_url = None
+    if FONT_SOURCE.exists():
+        font_url = _publish('frank-the-architect', '.ttf', FONT_SOURCE.read_bytes())
+
+    logo_url = None
+    logo_source = next((p for p in LOGO_SOURCES if p.exists()), None)
+    if logo_source is not None:
+        try:
+            data, suffix = _resized_logo(logo_source)
+        except (ImportError, OSError):
+            # No Pillow or an unreadable image: ship the original file unchanged
+            data, suffix = logo_source.read_bytes(), logo_source.suffix.lower()
+        logo_url = _publish('logo', suffix, data)
+
+    assets = Assets(font_url=font_url, logo_url=logo_url)
+    STATIC_DIR.mkdir(exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(asdict(assets)), encoding='utf-8')
+    return assets
+
+
+def _load_manifest():
+    try:
+        assets = Assets(**json.loads(MANIFEST_PATH.read_text(encoding='utf-8')))
+    except (OSError, ValueError, TypeError):
+        return None
+    # Every published file must still be there
+    for url in (assets.font_url, assets.logo_url):
+        if url and not (STATIC_DIR / url.rsplit('/', 1)[-1]).exists():
+            return None
+    return assets
+
+
+@functools.lru_cache(maxsize=1)
+def get_assets():
+    """Prepared assets for this process: the build-time manifest, or built on first use."""
+    return _load_manifest() or build_assets()
+
+
+def clean_stale_assets(keep):
+    """Remove previously published files in ``static/`` that are not in ``keep``."""
+    if not STATIC_DIR.exists():
+        return
+    keep_names = {url.rsplit('/', 1)[-1] for url in keep if url} | {MANIFEST_PATH.name}
+    for path in STATIC_DIR.iterdir():
+        if path.is_file() and path.name not in keep_names:
+            path.unlink()
+
+
+if __name__ == '__main__':
+    assets = build_assets()
+    clean_stale_assets([assets.font_url, assets.logo_url])
+    for label, url in (('font', assets.font_url), ('logo', assets.logo_url)):
+        print(f'{label}: {url or "(source missing)"}')
@@ -0,0 +1,133 @@
+"""Batch sizing of an uploaded line list.
+
+A line list is a CSV or XLSX with one row per line: a line id, a flow in
+gpm, a line type (Suction/Return) and optionally a run length in ft.
+Every row is sized against the catalog with the same design/line limits
+as the single-line view, and the friction loss at the recommended size
+is reported per 100 ft and over the run length.
+"""
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from hydraulics import REFERENCE_LENGTH_FT, friction_factor, head_loss
+from sizing import LINE_TYPES, STATUS_LABELS, catalog_breakpoints, normalize_line_type, reynolds
+from uploads import match_columns, read_table
+
+# Accepted header spellings (lower-cased, stripped) for each line list column
+_COLUMN_ALIASES = {
+    'line_id': ('line id', 'line_id', 'lineid', 'line', 'id', 'tag'),
+    'flow_gpm': ('flow (gpm)', 'flow rate (gpm)', 'flow_gpm', 'flow', 'gpm', 'flow rate'),
+    'line_type': ('line type', 'line_type', 'type'),
+}
+
+# Optional columns, filled with NaN when absent
+_OPTIONAL_COLUMN_ALIASES = {
+    'length_ft': ('length (ft)', 'run length (ft)', 'length_ft', 'length', 'run length'),
+}
+
+RESULT_COLUMNS = ['Line ID', 'Flow (gpm)', 'Line Type', 'Recommended Size (in)',
+                  'Velocity (ft/s)', 'Status', 'Head Loss (ft/100 ft)', 'Length (ft)', 'Head Loss (ft)']
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def read_line_list(file, name=None):
+    """Read a CSV/XLSX line list into a DataFrame with ``line_id``, ``flow_gpm``, ``line_type`` and ``length_ft``.
+
+    ``file`` may be a path or a file-like object (e.g. a Streamlit upload);
+    the format is picked from ``name`` or the file's own name.
+    """
+    raw = read_table(file, name, 'Line list')
+    found = match_columns(raw, {**_COLUMN_ALIASES, **_OPTIONAL_COLUMN_ALIASES})
+    for key, aliases in _COLUMN_ALIASES.items():
+        if found[key] is None:
+            raise ValueError(f'Line list is missing a "{aliases[0]}" column. '
+                             f'Found columns: {", ".join(map(str, raw.columns))}')
+    columns = {key: raw[match] if match is not None else pd.Series(np.nan, index=raw.index)
+               for key, match in found.items()}
+
+    return pd.DataFrame({
+        'line_id': columns['line_id'].astype(str),
+        'flow_gpm': pd.to_numeric(columns['flow_gpm'], errors='coerce'),
+        'line_type': columns['line_type'].map(normalize_line_type),
+        'length_ft': pd.to_numeric(columns['length_ft'], errors='coerce'),
+    })
+
+
+def size_line_list(lines, catalog, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Size every row of a line list from :func:`read_line_list`.
+
+    Rows are processed ``chunk_size`` at a time; ``progress`` is called
+    with the fraction done after each chunk. Returns a DataFrame with
+    :data:`RESULT_COLUMNS`; ``Head Loss (ft)`` is over ``length_ft`` when
+    the line list has one, else NaN.
+    """
+    n = len(lines)
+    flows = lines['flow_gpm'].to_numpy(dtype=np.float64)
+    line_types = lines['line_type'].to_numpy(dtype=object)
+    if 'length_ft' in lines:
+        lengths = lines['length_ft'].to_numpy(dtype=np.float64)
+    else:
+        lengths = np.full(n, np.nan)
+
+    size_out = np.full(n, np.nan)
+    velocity_out = np.full(n, np.nan)
+    inner_out = np.full(n, np.nan)
+    friction_out = np.full(n, np.nan)
+    status_out = np.full(n, 'Invalid input', dtype=object)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        chunk_flows = flows[start:stop]
+        valid = np.isfinite(chunk_flows) & (chunk_flows >= 0)
+        for line_type in LINE_TYPES:
+            rows = np.flatnonzero(valid & (line_types[start:stop] == line_type))
+            if not len(rows):
+                continue
+            # One vectorized search over the precomputed flow breakpoints per line type
+            breakpoints = catalog_breakpoints(catalog, line_type)
+            idx, vel, status = breakpoints.lookup(chunk_flows[rows])
+            found = idx >= 0
+            out = start + rows
+            size_out[out[found]] = breakpoints.nominal_in[idx[found]]
+            velocity_out[out[found]] = vel[found]
+            inner_in = breakpoints.inner_in[idx[found]]
+            inner_out[out[found]] = inner_in
+            friction_out[out[found]] = friction_factor(reynolds(vel[found], inner_in, catalog.nu),
+                                                       catalog.roughness_ft / (inner_in / 12))
+            status_out[out[found]] = np.take(STATUS_LABELS, status[found])
+            status_out[out[~found]] = 'None Available'
+        if progress is not None:
+            progress(stop / n)
+    metrics.incr('rows_sized', n)
+
+    # Darcy-Weisbach at the recommended size; NaN where no size was found
+    per_100ft = head_loss(friction_out, velocity_out, inner_out, REFERENCE_LENGTH_FT)
+    over_run = head_loss(friction_out, velocity_out, inner_out, lengths)
+    return pd.DataFrame({
+        'Line ID': lines['line_id'].to_numpy(),
+        'Flow (gpm)': flows,
+        'Line Type': lines['line_type'].to_numpy(),
+        'Recommended Size (in)': size_out,
+        'Velocity (ft/s)': velocity_out.round(2),
+        'Status': status_out,
+        'Head Loss (ft/100 ft)': per_100ft.round(2),
+        'Length (ft)': lengths,
+        'Head Loss (ft)': over_run.round(2),
+    }, columns=RESULT_COLUMNS)
+
+
+def to_csv_bytes(results):
+    """Encode sizing results as CSV for download."""
+    return results.to_csv(index=False).encode('utf-8')
+
+
+def to_xlsx_bytes(results):
+    """Encode sizing results as an XLSX workbook for download."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        results.to_excel(writer, index=False, sheet_name='Sizing')
+    return buffer.getvalue()
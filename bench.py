@@ -0,0 +1,235 @@
+"""Benchmark suite for the stages of a rerun.
+
+Times workbook parsing, the velocity/Reynolds computation, the Colebrook
+friction-factor solve, pipe network solves, HTML table
+generation, Altair chart spec building and a full script run through
+Streamlit's AppTest harness, against the bundled workbook and synthetic
+large catalogs. Results are JSON so runs can be compared across commits::
+
+    python bench.py --output before.json
+    python bench.py --output after.json --compare before.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+
+from catalog import CATALOG_PATH, build_library, parse_catalog
+from hydraulics import friction_losses
+from pump import EXAMPLE_PUMP_CURVE, operating_points
+from render import pipe_table_html, velocity_chart, velocity_sweep_chart
+from sizing import size_catalog
+from sweep import flow_sweep
+
+APP_PATH = Path(__file__).parent / 'app.py'
+
+# Catalog sizes for the synthetic workbooks
+SYNTHETIC_SIZES = (100, 1000)
+
+
+def synthetic_workbook(n_sizes, formulas=False):
+    """Workbook bytes laid out like pipe_sizing.xlsx with ``n_sizes`` pipe sizes.
+
+    With ``formulas`` the inner diameters are formulas of the nominal size
+    and a shared ratio in E9, saved without cached results.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws['A5'], ws['B5'], ws['D5'], ws['E5'] = 'Flow Rate (gpm)', 100, 'gal_to_ft^3', 0.133681
+    ws['A6'], ws['B6'], ws['D6'], ws['E6'] = 'Line Type', 'Suction', 'sec_per_min', 60
+    ws['D7'], ws['E7'] = 'π', 3.141593
+    ws['A8'], ws['B8'] = 'Water kinematic viscosity (ft/s)', 1.1e-05
+    ws['A12'], ws['B12'] = 'Nominal Size (in)', 'Inner Diameter (in)'
+    nominal = np.linspace(1.0, 48.0, n_sizes)
+    ws['D9'], ws['E9'] = 'id_ratio', 0.95
+    for i, n in enumerate(nominal.tolist(), start=13):
+        ws.cell(row=i, column=1, value=round(n, 4))
+        ws.cell(row=i, column=2, value=f'=ROUND(A{i}*$E$9, 4)' if formulas else round(n * 0.95, 4))
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def synthetic_network(catalog, n=20, seed=0):
+    """An n x n looped grid network with fixed heads at the corners and random demands."""
+    from network import Node, PipeNetwork, Segment
+
+    rng = np.random.default_rng(seed)
+    sizes = catalog.nominal_in[catalog.nominal_in >= 1.5]
+    corners = {(0, 0), (0, n - 1), (n - 1, 0), (n - 1, n - 1)}
+    nodes = [Node(f'{i},{j}', head_ft=0.0) if (i, j) in corners
+             else Node(f'{i},{j}', demand_gpm=float(rng.uniform(-20, 20)))
+             for i in range(n) for j in range(n)]
+    segments = []
+    for i in range(n):
+        for j in range(n):
+            for di, dj, tag in ((1, 0, 'v'), (0, 1, 'h')):
+                if i + di < n and j + dj < n:
+                    segments.append(Segment(f'{tag}{i},{j}', f'{i},{j}', f'{i + di},{j + dj}',
+                                            float(rng.choice(sizes)), 20.0))
+    return PipeNetwork(nodes, segments, catalog)
+
+
+def timeit(func, repeat=None, min_time=0.2):
+    """Run ``func`` repeatedly and return timing stats in milliseconds."""
+    func()  # warm up
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < (repeat or 5) or (repeat is None and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': len(times),
+        'min_ms': round(min(times), 4),
+        'median_ms': round(statistics.median(times), 4),
+        'mean_ms': round(statistics.fmean(times), 4),
+    }
+
+
+def bench_catalog(name, wb_bytes, results):
+    catalog = parse_catalog(wb_bytes)
+    results[f'parse/{name}'] = timeit(lambda: parse_catalog(wb_bytes))
+    results[f'library/{name}/build'] = timeit(lambda: build_library(catalog))
+    library = build_library(catalog)
+    results[f'library/{name}/select-every-series'] = timeit(lambda: [library.select(*key) for key in library.series()])
+
+    flows = np.linspace(1, 1000, 10_000)
+    results[f'sizing/{name}/1-flow'] = timeit(lambda: size_catalog(catalog, 100.0, 'Suction'))
+    results[f'sizing/{name}/10k-flows'] = timeit(lambda: size_catalog(catalog, flows, 'Suction'))
+    many = size_catalog(catalog, flows, 'Suction')
+    results[f'head-loss/{name}/10k-flows'] = timeit(
+        lambda: friction_losses(many, 250.0, {'90° elbow': 4}, roughness_ft=catalog.roughness_ft))
+    results[f'pump/{name}/operating-points'] = timeit(
+        lambda: operating_points(catalog, 'Return', EXAMPLE_PUMP_CURVE, 5.0, 250.0, {'90° elbow': 4}))
+
+    result = size_catalog(catalog, 100.0, 'Suction')
+    results[f'table/{name}'] = timeit(lambda: pipe_table_html(catalog.nominal_in, result.velocity,
+                                                              result.design_limit, result.line_limit))
+    if name == 'bundled':
+        network = synthetic_network(catalog)
+        solution = network.solve()
+        segment = network.segments[len(network.segments) // 2]
+        results['network/760-segments/solve'] = timeit(network.solve)
+        results['network/760-segments/resize-resolve'] = timeit(
+            lambda: network.resize(segment.id, catalog.nominal_in[-1]).solve(initial=solution))
+    results[f'sweep/{name}/10k-flows'] = timeit(lambda: flow_sweep(catalog, 'Suction', 500.0))
+    if name == 'bundled':
+        sweep = flow_sweep(catalog, 'Suction', 500.0)
+        results['chart/bundled/flow-sweep'] = timeit(lambda: velocity_sweep_chart(sweep, 100.0).to_dict())
+    results[f'chart/{name}'] = timeit(lambda: velocity_chart(catalog.nominal_in, result.velocity,
+                                                             result.design_limit, result.line_limit).to_dict())
+    return catalog
+
+
+def bench_formulas(results, n_sizes=1000):
+    """Compiling a sheet's formulas and recomputing after one input cell changes."""
+    from openpyxl import load_workbook
+
+    from formulas import FormulaGraph, compile_formula, sheet_cells
+
+    wb_bytes = synthetic_workbook(n_sizes, formulas=True)
+    results[f'parse/synthetic-{n_sizes}-formulas'] = timeit(lambda: parse_catalog(wb_bytes))
+    ws = load_workbook(BytesIO(wb_bytes)).active
+    cells = sheet_cells(ws.iter_rows(values_only=True))
+
+    def build():
+        compile_formula.cache_clear()
+        return FormulaGraph(cells)
+
+    results[f'formulas/{n_sizes}-cells/compile'] = timeit(build)
+    graph = FormulaGraph(cells)
+    ratios = itertools.cycle(np.linspace(0.9, 0.99, 101).tolist())
+    # E9 feeds every inner diameter; A13 only its own row
+    results[f'formulas/{n_sizes}-cells/set-shared-input'] = timeit(lambda: graph.set({'E9': next(ratios)}))
+    results[f'formulas/{n_sizes}-cells/set-one-row'] = timeit(lambda: graph.set({'A13': next(ratios)}))
+
+
+def bench_app(results, reruns=10):
+    """Full script runs of app.py through AppTest: the first run and flow-change reruns."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    first = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(f'app.py raised: {at.exception[0].value}')
+
+    flows = iter(np.linspace(20, 400, reruns + 1).tolist())
+
+    def rerun():
+        at.number_input[0].set_value(next(flows))
+        at.run()
+
+    results['app/first-run'] = {'runs': 1, 'min_ms': round(first, 4), 'median_ms': round(first, 4),
+                                'mean_ms': round(first, 4)}
+    results['app/rerun'] = timeit(rerun, repeat=reruns)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(include_app=True, synthetic_sizes=SYNTHETIC_SIZES):
+    """Run every benchmark and return the JSON-serializable report."""
+    results = {}
+    bench_catalog('bundled', CATALOG_PATH.read_bytes(), results)
+    for n in synthetic_sizes:
+        bench_catalog(f'synthetic-{n}', synthetic_workbook(n), results)
+    bench_formulas(results)
+    if include_app:
+        bench_app(results)
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': results,
+    }
+
+
+def compare(current, baseline):
+    """Print median-time ratios of ``current`` vs ``baseline`` (<1 is faster)."""
+    print(f'{"benchmark":<36} {"baseline ms":>12} {"current ms":>12} {"ratio":>7}')
+    for name, stats in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('nan')
+        print(f'{name:<36} {before["median_ms"]:>12.3f} {stats["median_ms"]:>12.3f} {ratio:>7.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark catalog load, sizing, rendering and reruns.')
+    parser.add_argument('--output', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--no-app', action='store_true', help='skip the AppTest end-to-end runs')
+    args = parser.parse_args(argv)
+
+    report = run(include_app=not args.no_app)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""Pipe catalog read from ``pipe_sizing.xlsx``.
+
+The workbook is parsed in a single openpyxl pass into a frozen
+:class:`PipeCatalog`. Formula cells are evaluated in-process by
+:mod:`formulas` rather than read from the cached results of whatever
+tool last saved the file. Parsed catalogs are shared process-wide (every
+Streamlit session, the API and scripts) and are only rebuilt when the
+file's mtime/size changes *and* its content hash differs.
+
+``python catalog.py`` precompiles the workbook into a JSON artifact next
+to it. When the artifact's version matches the workbook's hash it is
+loaded instead, so a cold start never imports openpyxl.
+
+The workbook's table is the PVC Schedule 40 series. It is combined with
+the built-in series from :mod:`standards` into a :class:`PipeLibrary`,
+which keeps every (material, schedule) series as a contiguous slice of
+one set of columnar arrays; switching series is an index lookup.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+from formulas import CellError, FormulaError, FormulaGraph, column_letters, is_formula, sheet_cells
+from standards import ROUGHNESS_FT, standard_series
+
+CATALOG_PATH = Path(__file__).parent / 'pipe_sizing.xlsx'
+
+# Bumped whenever the artifact layout changes; older artifacts are ignored
+ARTIFACT_FORMAT = 2
+
+# Fallback rows for the inputs if label detection fails (based on current workbook)
+_FALLBACK_ROWS = {'flow': 5, 'line_type': 6, 'nu': 8}
+
+# Input labels in column A, matched case-insensitively by prefix
+_LABEL_PREFIXES = {'flow': 'flow rate', 'line_type': 'line type', 'nu': 'water'}
+
+# The series described by the workbook's pipe table
+WORKBOOK_MATERIAL = 'PVC'
+WORKBOOK_SCHEDULE = 'Schedule 40'
+
+
+class CatalogError(ValueError):
+    """Raised when the workbook does not contain a usable pipe table."""
+
+
+@dataclass(frozen=True, eq=False)
+class PipeCatalog:
+    """Immutable pipe sizes of one series and the workbook's constants.
+
+    ``nominal_in`` and ``inner_in`` are read-only arrays sorted by nominal
+    size. ``version`` is the SHA-256 of the workbook bytes (with the
+    series appended for series other than the workbook's own) and
+    identifies the catalog in downstream cache keys.
+    """
+    nominal_in: np.ndarray
+    inner_in: np.ndarray
+    nu: float
+    gal_to_ft3: float
+    sec_per_min: float
+    pi: float
+    flow_gpm: float
+    line_type: str
+    version: str
+    material: str = WORKBOOK_MATERIAL
+    schedule: str = WORKBOOK_SCHEDULE
+    roughness_ft: float = ROUGHNESS_FT[WORKBOOK_MATERIAL]
+
+    def __len__(self):
+        return len(self.nominal_in)
+
+
+@dataclass(frozen=True, eq=False)
+class PipeLibrary:
+    """Every pipe series in one set of read-only columnar arrays.
+
+    Rows are sorted by (material, schedule, nominal size), so each series
+    is the contiguous slice in ``series_slices``; ``row_index`` maps
+    (material, schedule, nominal) to a row. Build with :func:`build_library`.
+    """
+    materials: tuple  # names indexed by material_code
+    schedules: tuple  # names indexed by schedule_code
+    material_code: np.ndarray
+    schedule_code: np.ndarray
+    nominal_in: np.ndarray
+    inner_in: np.ndarray
+    series_slices: dict  # (material, schedule) -> slice of rows
+    row_index: dict  # (material, schedule, nominal) -> row
+    base: PipeCatalog  # the workbook's own series and constants
+    version: str
+    # Catalogs handed out by select(), so they live and die with the library
+    _selected: dict = field(default_factory=dict, repr=False)
+
+    def __len__(self):
+        return len(self.nominal_in)
+
+    def series(self):
+        """Every (material, schedule) pair, in row order."""
+        return tuple(self.series_slices)
+
+    def schedules_for(self, material):
+        """Schedules available in ``material``, in row order."""
+        return tuple(schedule for m, schedule in self.series_slices if m == material)
+
+    def row(self, material, schedule, nominal_in):
+        """Row of one pipe; raises :class:`CatalogError` if the library doesn't have it."""
+        try:
+            return self.row_index[(material, schedule, float(nominal_in))]
+        except KeyError:
+            raise CatalogError(f'No {nominal_in}" {material} {schedule} pipe in the catalog.') from None
+
+    def inner_diameter(self, material, schedule, nominal_in):
+        return float(self.inner_in[self.row(material, schedule, nominal_in)])
+
+    def select(self, material=None, schedule=None):
+        """The ``material``/``schedule`` series (default: the workbook's) as a shared :class:`PipeCatalog`.
+
+        Without a ``schedule``, another material's first schedule is used.
+        """
+        material = material or self.base.material
+        if not schedule:
+            schedules = self.schedules_for(material)
+            schedule = self.base.schedule if material == self.base.material or not schedules else schedules[0]
+        key = (material, schedule)
+        catalog = self._selected.get(key)
+        if catalog is None:
+            catalog = self._selected.setdefault(key, _series_catalog(self, *key))
+        return catalog
+
+
+def _frozen_array(values):
+    arr = np.asarray(values, dtype=np.float64)
+    arr.flags.writeable = False
+    return arr
+
+
+def build_library(base, series=None):
+    """Combine the workbook catalog ``base`` with ``series`` (default: :func:`standards.standard_series`).
+
+    ``series`` maps (material, schedule) to ``{nominal in: inner in}``;
+    the workbook's rows replace the built-in series they describe.
+    """
+    series = dict(standard_series() if series is None else series)
+    series[(base.material, base.schedule)] = dict(zip(base.nominal_in.tolist(), base.inner_in.tolist()))
+    nominal, inner = [], []
+    series_slices, row_index = {}, {}
+    for material, schedule in sorted(series):
+        start = len(nominal)
+        for n, d in sorted(series[(material, schedule)].items()):
+            row_index[(material, schedule, float(n))] = len(nominal)
+            nominal.append(float(n))
+            inner.append(float(d))
+        series_slices[(material, schedule)] = slice(start, len(nominal))
+
+    materials = tuple(sorted({m for m, _ in series_slices}))
+    schedules = tuple(sorted({s for _, s in series_slices}))
+    material_code = np.empty(len(nominal), dtype=np.int8)
+    schedule_code = np.empty(len(nominal), dtype=np.int16)
+    for (material, schedule), rows in series_slices.items():
+        material_code[rows] = materials.index(material)
+        schedule_code[rows] = schedules.index(schedule)
+    material_code.flags.writeable = False
+    schedule_code.flags.writeable = False
+
+    return PipeLibrary(
+        materials=materials,
+        schedules=schedules,
+        material_code=material_code,
+        schedule_code=schedule_code,
+        nominal_in=_frozen_array(nominal),
+        inner_in=_frozen_array(inner),
+        series_slices=series_slices,
+        row_index=row_index,
+        base=base,
+        version=base.version,
+    )
+
+
+def _series_catalog(library, material, schedule):
+    rows = library.series_slices.get((material, schedule))
+    if rows is None:
+        raise CatalogError(f'Unknown pipe series {material} {schedule}. Available: '
+                           + ', '.join(f'{m} {s}' for m, s in library.series()))
+    if material not in ROUGHNESS_FT:
+        raise CatalogError(f'No pipe roughness known for {material}.')
+    base = library.base
+    if (material, schedule) == (base.material, base.schedule):
+        return base
+    # Slices of read-only arrays are read-only views; nothing is copied
+    return PipeCatalog(
+        nominal_in=library.nominal_in[rows],
+        inner_in=library.inner_in[rows],
+        nu=base.nu,
+        gal_to_ft3=base.gal_to_ft3,
+        sec_per_min=base.sec_per_min,
+        pi=base.pi,
+        flow_gpm=base.flow_gpm,
+        line_type=base.line_type,
+        version=f'{library.version}:{material}:{schedule}',
+        material=material,
+        schedule=schedule,
+        roughness_ft=ROUGHNESS_FT[material],
+    )
+
+
+def _sheet_rows(wb_bytes):
+    """Rows of the first sheet's values, with any formulas evaluated by :class:`formulas.FormulaGraph`.
+
+    Falls back to the workbook's cached results if a formula can't be
+    compiled, provided every formula cell has one.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filename=BytesIO(wb_bytes), data_only=False, read_only=True)
+    try:
+        ws = wb[wb.sheetnames[0]]
+        rows = [tuple(getattr(v, 'text', v) for v in row) for row in ws.iter_rows(min_col=1, values_only=True)]
+        title = ws.title
+    finally:
+        wb.close()
+    if not any(is_formula(v) for row in rows for v in row):
+        return rows
+
+    try:
+        values = FormulaGraph(sheet_cells(rows), title).values
+    except FormulaError as exc:
+        wb = load_workbook(filename=BytesIO(wb_bytes), data_only=True, read_only=True)
+        try:
+            cached = [tuple(row) for row in wb[wb.sheetnames[0]].iter_rows(min_col=1, values_only=True)]
+        finally:
+            wb.close()
+        for r, row in enumerate(rows, start=1):
+            for c, value in enumerate(row, start=1):
+                if is_formula(value) and (r > len(cached) or c > len(cached[r - 1]) or cached[r - 1][c - 1] is None):
+                    raise CatalogError(f'Cannot evaluate the formulas in the sheet ({exc}) and the workbook '
+                                       f'has no saved results to use instead.') from None
+        return cached
+    return [tuple(values.get(f'{column_letters(c)}{r}') for c in range(1, len(row) + 1))
+            for r, row in enumerate(rows, start=1)]
+
+
+def parse_catalog(wb_bytes, version=None):
+    """Parse workbook bytes into a :class:`PipeCatalog` in one pass over the first sheet."""
+    if version is None:
+        version = hashlib.sha256(wb_bytes).hexdigest()
+
+    label_rows = {}
+    col_b = {}
+    constants = {}
+    constant_rows = {}
+    sizes = []
+    in_table = False
+    for r, row in enumerate(_sheet_rows(wb_bytes), start=1):
+        row = tuple(row[:5]) + (None,) * (5 - len(row))
+        a, b, _, d, e = row
+
+        # Column D holds constant labels, column E their numeric value
+        if isinstance(d, str):
+            constants[d.strip()] = e
+            constant_rows[d.strip()] = r
+
+        if in_table:
+            # Read table rows until first blank nominal size
+            if a is None:
+                in_table = False
+            else:
+                if isinstance(a, CellError) or isinstance(b, CellError):
+                    raise CatalogError(f'Row {r} of the pipe size table evaluates to an error ({a}, {b}).')
+                sizes.append((float(a), float(b)))
+            continue
+
+        col_b[r] = b
+        if isinstance(a, str):
+            text = a.strip().lower()
+            if text.startswith('nominal size'):
+                if not sizes:
+                    in_table = True
+            else:
+                for key, prefix in _LABEL_PREFIXES.items():
+                    if key not in label_rows and text.startswith(prefix):
+                        label_rows[key] = r
+
+    if not sizes and not in_table:
+        raise CatalogError('Could not find the pipe size table header in the sheet. '
+                           'Ensure the header starts with "Nominal Size" in column A.')
+    if not sizes:
+        raise CatalogError('No pipe sizes found under the table header.')
+
+    def checked(value, cell):
+        if isinstance(value, CellError):
+            raise CatalogError(f'Cell {cell} evaluates to an error ({value}).')
+        return value
+
+    def input_value(key):
+        row = label_rows.get(key, _FALLBACK_ROWS[key])
+        return checked(col_b.get(row), f'B{row}')
+
+    def constant(label):
+        return checked(constants.get(label), f'E{constant_rows.get(label)}')
+
+    sizes.sort(key=lambda s: s[0])
+    nominal, inner = zip(*sizes)
+    return PipeCatalog(
+        nominal_in=_frozen_array(nominal),
+        inner_in=_frozen_array(inner),
+        nu=float(input_value('nu') or 1.1e-05),
+        gal_to_ft3=float(constant('gal_to_ft^3') or 0.133681),
+        sec_per_min=float(constant('sec_per_min') or 60.0),
+        pi=float(constant('π') or 3.141592653589793),
+        flow_gpm=float(input_value('flow') or 100.0),
+        line_type=str(input_value('line_type') or 'Suction'),
+        version=version,
+    )
+
+
+def artifact_path(path=CATALOG_PATH):
+    """Location of the precompiled artifact for a workbook (``pipe_sizing.catalog.json``)."""
+    return Path(path).with_suffix('.catalog.json')
+
+
+def write_artifact(catalog, path):
+    """Write ``catalog`` to ``path`` as a precompiled JSON artifact."""
+    data = {
+        'format': ARTIFACT_FORMAT,
+        'version': catalog.version,
+        'nominal_in': catalog.nominal_in.tolist(),
+        'inner_in': catalog.inner_in.tolist(),
+        'nu': catalog.nu,
+        'gal_to_ft3': catalog.gal_to_ft3,
+        'sec_per_min': catalog.sec_per_min,
+        'pi': catalog.pi,
+        'flow_gpm': catalog.flow_gpm,
+        'line_type': catalog.line_type,
+    }
+    path = Path(path)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(data), encoding='utf-8')
+    tmp.replace(path)
+
+
+def load_artifact(path, version):
+    """Load a precompiled catalog, or return ``None`` if it is missing, stale or unreadable."""
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if data.get('format') != ARTIFACT_FORMAT or data.get('version') != version:
+        return None
+    try:
+        return PipeCatalog(
+            nominal_in=_frozen_array(data['nominal_in']),
+            inner_in=_frozen_array(data['inner_in']),
+            nu=float(data['nu']),
+            gal_to_ft3=float(data['gal_to_ft3']),
+            sec_per_min=float(data['sec_per_min']),
+            pi=float(data['pi']),
+            flow_gpm=float(data['flow_gpm']),
+            line_type=str(data['line_type']),
+            version=version,
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+_cache_lock = threading.Lock()
+_cache = {}  # resolved path -> ((mtime_ns, size), PipeLibrary)
+
+
+def get_catalog(path=CATALOG_PATH, material=None, schedule=None):
+    """Return the shared catalog of one series (default: the workbook's) for ``path``."""
+    return get_library(path).select(material, schedule)
+
+
+def get_library(path=CATALOG_PATH):
+    """Return the shared :class:`PipeLibrary` for ``path``, re-parsing only if the file changed.
+
+    A cheap ``stat`` is done on every call; the file is re-read and hashed
+    only when its mtime or size moved, and re-parsed only when the hash
+    differs from the cached catalog's ``version`` and there is no
+    up-to-date precompiled artifact.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stamp:
+            metrics.incr('catalog_cache_hits')
+            return entry[1]
+        metrics.incr('catalog_cache_misses')
+        wb_bytes = path.read_bytes()
+        version = hashlib.sha256(wb_bytes).hexdigest()
+        if entry is not None and entry[1].version == version:
+            library = entry[1]
+        else:
+            with metrics.stage('catalog_parse'):
+                catalog = load_artifact(artifact_path(path), version) or parse_catalog(wb_bytes, version)
+                library = build_library(catalog)
+        _cache[path] = (stamp, library)
+        return library
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Precompile pipe_sizing.xlsx into a JSON catalog artifact.')
+    parser.add_argument('workbook', nargs='?', default=str(CATALOG_PATH))
+    args = parser.parse_args()
+
+    source = Path(args.workbook)
+    catalog = parse_catalog(source.read_bytes())
+    target = artifact_path(source)
+    write_artifact(catalog, target)
+    print(f'Wrote {target} ({len(catalog)} sizes, version {catalog.version[:12]})')
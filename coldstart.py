@@ -0,0 +1,90 @@
+"""Cold-start timing.
+
+The app logs one line per process with the time its first run spent on
+imports vs rendering. ``python coldstart.py`` measures a cold start in a
+fresh interpreter and prints a per-stage breakdown::
+
+    python coldstart.py
+    python coldstart.py --json
+"""
+import json
+import logging
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+logger = logging.getLogger('pipe_sizing.coldstart')
+if not logger.handlers:
+    # Streamlit only configures its own loggers; make sure this line reaches stderr
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(asctime)s %(name)s: %(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_reported = False
+_lock = threading.Lock()
+
+
+def record_first_render(import_seconds, render_seconds):
+    """Log the cold-start breakdown the first time a render completes in this process."""
+    global _reported
+    with _lock:
+        if _reported:
+            return
+        _reported = True
+    heavy = [name for name in ('pandas', 'altair', 'openpyxl', 'PIL') if name in sys.modules]
+    logger.info('cold start: app imports %.1f ms, first render %.1f ms (loaded: %s)',
+                import_seconds * 1000, render_seconds * 1000, ', '.join(heavy) or 'none')
+
+
+# Run in a fresh interpreter so nothing is already imported or cached
+_PROBE = r'''
+import json, sys, time
+t0 = time.perf_counter()
+stages = {}
+
+def mark(name):
+    global t0
+    now = time.perf_counter()
+    stages[name] = round((now - t0) * 1000, 1)
+    t0 = now
+
+import streamlit
+mark('import streamlit')
+import numpy
+mark('import numpy')
+import assets, catalog, render, sizing
+mark('import app modules')
+catalog.get_catalog()
+mark('load catalog')
+stages['catalog source'] = 'workbook (openpyxl)' if 'openpyxl' in sys.modules else 'precompiled artifact'
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(APP_PATH, default_timeout=60)
+mark('init test harness')
+at.run()
+mark('first render')
+at.run()
+mark('second render')
+stages['errors'] = [str(e.value) for e in at.exception]
+print(json.dumps(stages))
+'''
+
+
+def measure(app_dir=None):
+    """Measure a cold start in a subprocess and return ``{stage: milliseconds}``."""
+    app_dir = Path(app_dir or Path(__file__).parent).resolve()
+    code = _PROBE.replace('APP_PATH', repr(str(app_dir / 'app.py')))
+    out = subprocess.run([sys.executable, '-c', code], cwd=app_dir, capture_output=True,
+                         text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    stages = measure()
+    if '--json' in sys.argv[1:]:
+        print(json.dumps(stages))
+    else:
+        for name, value in stages.items():
+            print(f'{name:>20}: {value}{" ms" if isinstance(value, float) else ""}')
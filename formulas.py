@@ -0,0 +1,570 @@
+"""Worksheet formulas compiled into Python callables with incremental recalculation.
+
+Each formula is tokenized with openpyxl's tokenizer, parsed once and
+compiled into a Python function of the cell values. The formulas form a
+dependency graph that is sorted once, so a full evaluation is a single
+pass, and :meth:`FormulaGraph.set` recomputes only the cells that depend
+on the inputs that changed. The workbook stays the source of truth
+without relying on whatever tool last saved it to have cached results.
+
+Supported: numbers, text, booleans, single-sheet cell and range
+references, the arithmetic, comparison, ``&`` and ``%`` operators, and
+the functions in :data:`FUNCTIONS` plus ``IF`` and ``IFERROR``. Anything
+else raises :class:`FormulaError` when the formula is compiled.
+"""
+import functools
+import math
+import operator
+import re
+
+# Column letters and row of an A1 reference, with optional $ anchors
+_CELL_RE = re.compile(r'^\$?([A-Z]{1,3})\$?([1-9][0-9]*)$')
+
+# Infix operators by precedence, lowest first (Excel's order); all are left-associative
+_INFIX_PRECEDENCE = {'=': 1, '<>': 1, '<': 1, '>': 1, '<=': 1, '>=': 1, '&': 2, '+': 3, '-': 3, '*': 4, '/': 4, '^': 5}
+_COMPARISONS = {'=': operator.eq, '<>': operator.ne, '<': operator.lt, '>': operator.gt, '<=': operator.le,
+                '>=': operator.ge}
+
+
+class FormulaError(ValueError):
+    """Raised for formulas that can't be compiled, or for circular references."""
+
+
+class CellError:
+    """An Excel error value (``#DIV/0!``, ``#VALUE!``, ...) held by a cell."""
+    __slots__ = ('code',)
+
+    def __init__(self, code):
+        self.code = code
+
+    def __eq__(self, other):
+        return isinstance(other, CellError) and other.code == self.code
+
+    def __hash__(self):
+        return hash(self.code)
+
+    def __repr__(self):
+        return self.code
+
+
+class _NotAvailable(LookupError):
+    """A lookup found no match (Excel's ``#N/A``)."""
+
+
+_ERROR_CODES = ((ZeroDivisionError, '#DIV/0!'), (_NotAvailable, '#N/A'), (IndexError, '#REF!'),
+                (ValueError, '#NUM!'), (OverflowError, '#NUM!'))
+
+
+def column_index(letters):
+    """1-based column number of column ``letters`` (``'A'`` -> 1, ``'AA'`` -> 27)."""
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def column_letters(index):
+    """Column letters of the 1-based column number ``index``."""
+    letters = ''
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _split_cell(ref):
+    match = _CELL_RE.match(ref.upper())
+    if match is None:
+        raise FormulaError(f'Unsupported reference {ref!r} (only A1-style cells and ranges on one sheet).')
+    return column_index(match.group(1)), int(match.group(2))
+
+
+def expand_range(ref):
+    """Cells of an A1 reference as rows of coordinates: ``'A1:B2'`` -> ``(('A1', 'B1'), ('A2', 'B2'))``."""
+    start, _, end = ref.partition(':')
+    col0, row0 = _split_cell(start)
+    col1, row1 = _split_cell(end or start)
+    cols = range(min(col0, col1), max(col0, col1) + 1)
+    return tuple(tuple(f'{column_letters(c)}{r}' for c in cols) for r in range(min(row0, row1), max(row0, row1) + 1))
+
+
+# ---- runtime helpers referenced by compiled formulas ----
+
+class _Range(tuple):
+    """Values of a range reference, as a tuple of rows."""
+    __slots__ = ()
+
+
+def _range(values, rows):
+    return _Range(tuple(values.get(c) for c in row) for row in rows)
+
+
+def _items(args):
+    for arg in args:
+        if isinstance(arg, _Range):
+            for row in arg:
+                yield from row
+        else:
+            yield arg
+
+
+def _numbers(args):
+    """Numbers among ``args``; like Excel, text, booleans and blanks inside ranges are skipped, errors are not."""
+    for arg in args:
+        if isinstance(arg, _Range):
+            for row in arg:
+                for v in row:
+                    if isinstance(v, CellError):
+                        raise TypeError(v)
+                    if isinstance(v, (int, float)) and not isinstance(v, bool):
+                        yield v
+        elif isinstance(arg, (str, CellError)):
+            raise TypeError(arg)
+        elif arg is not None:
+            yield float(arg)
+
+
+def _num(value):
+    """A blank cell is 0 in arithmetic."""
+    return 0 if value is None else value
+
+
+def _truth(value):
+    """A value used as a condition; only the text "TRUE" and "FALSE" count, like in Excel."""
+    if isinstance(value, str):
+        if value.upper() not in ('TRUE', 'FALSE'):
+            raise TypeError(value)
+        return value.upper() == 'TRUE'
+    if isinstance(value, CellError):
+        raise TypeError(value)
+    return bool(value)
+
+
+def _logicals(args):
+    """Truth values among ``args``; text and blanks inside ranges are skipped, errors are not."""
+    for arg in args:
+        if isinstance(arg, _Range):
+            for row in arg:
+                for v in row:
+                    if isinstance(v, CellError):
+                        raise TypeError(v)
+                    if v is not None and not isinstance(v, str):
+                        yield bool(v)
+        elif arg is not None:
+            yield _truth(arg)
+
+
+def _blank_as(other):
+    return '' if isinstance(other, str) else False if isinstance(other, bool) else 0
+
+
+def _compare(a, b, op):
+    """Excel comparison: a blank equals ``""``, ``FALSE`` or 0 depending on the other side; text ignores case."""
+    if isinstance(a, CellError) or isinstance(b, CellError):
+        raise TypeError(a if isinstance(a, CellError) else b)
+    if a is None:
+        a = _blank_as(b)
+    if b is None:
+        b = _blank_as(a)
+    if isinstance(a, str) and isinstance(b, str):
+        a, b = a.lower(), b.lower()
+    return _COMPARISONS[op](a, b)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, CellError):
+        raise TypeError(value)
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _concat(a, b):
+    return _text(a) + _text(b)
+
+
+def _div(a, b):
+    return _num(a) / _num(b)
+
+
+def _pow(a, b):
+    return math.pow(_num(a), _num(b))
+
+
+def _round(x, digits=0, mode=0):
+    """Excel rounding away from zero (``mode`` 0), up (1, ROUNDUP) or down (-1, ROUNDDOWN)."""
+    scale = 10.0 ** int(digits)
+    value = abs(x) * scale
+    value = math.floor(value + 0.5) if mode == 0 else math.ceil(value) if mode > 0 else math.floor(value)
+    return math.copysign(value / scale, x)
+
+
+def _average(*args):
+    numbers = list(_numbers(args))
+    return sum(numbers) / len(numbers)
+
+
+def _count(*args):
+    count = 0
+    for arg in args:
+        cells = (v for row in arg for v in row) if isinstance(arg, _Range) else (arg,)
+        count += sum(1 for v in cells if isinstance(v, (int, float)) and not isinstance(v, bool))
+    return count
+
+
+def _lookup_key(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _match(value, rng, match_type=1):
+    """1-based position of ``value`` in a one-row or one-column range, like Excel's MATCH."""
+    cells = [v for v in _items([rng])]
+    key = _lookup_key(value)
+    if match_type == 0:
+        for i, cell in enumerate(cells, start=1):
+            if _lookup_key(cell) == key:
+                return i
+        raise _NotAvailable(value)
+    found = None
+    for i, cell in enumerate(cells, start=1):
+        if cell is None or isinstance(cell, str) != isinstance(key, str):
+            continue
+        if (match_type > 0 and _lookup_key(cell) <= key) or (match_type < 0 and _lookup_key(cell) >= key):
+            found = i
+        else:
+            break
+    if found is None:
+        raise _NotAvailable(value)
+    return found
+
+
+def _index(rng, row, col=1):
+    row, col = int(row), int(col)
+    if row < 1 or col < 1:
+        raise IndexError((row, col))
+    if len(rng) == 1 and col == 1 and row > 1:
+        row, col = 1, row  # one-row range: INDEX(range, n) counts along the row
+    return rng[row - 1][col - 1]
+
+
+def _vlookup(value, rng, col, approximate=True):
+    column = _Range((row[0],) for row in rng)
+    return rng[_match(value, column, 1 if approximate else 0) - 1][int(col) - 1]
+
+
+def _iferror(value, fallback):
+    try:
+        result = value()
+    except Exception:
+        return fallback()
+    return fallback() if isinstance(result, CellError) else result
+
+
+def _choose(index, *options):
+    index = int(index)
+    if not 1 <= index <= len(options):
+        raise ValueError(index)
+    return options[index - 1]
+
+
+# Worksheet functions by name; each takes the evaluated arguments (ranges as _Range)
+FUNCTIONS = {
+    'SUM': lambda *args: sum(_numbers(args)),
+    'MIN': lambda *args: min(_numbers(args), default=0),
+    'MAX': lambda *args: max(_numbers(args), default=0),
+    'AVERAGE': _average,
+    'COUNT': _count,
+    'ABS': abs,
+    'SQRT': math.sqrt,
+    'EXP': math.exp,
+    'LN': math.log,
+    'LOG10': math.log10,
+    'LOG': lambda x, base=10: math.log(x, base),
+    'POWER': _pow,
+    'PI': lambda: math.pi,
+    'INT': lambda x: float(math.floor(x)),
+    'MOD': lambda a, b: a - b * math.floor(a / b),
+    'ROUND': _round,
+    'ROUNDUP': lambda x, digits=0: _round(x, digits, 1),
+    'ROUNDDOWN': lambda x, digits=0: _round(x, digits, -1),
+    'AND': lambda *args: all(list(_logicals(args))),
+    'OR': lambda *args: any(list(_logicals(args))),
+    'NOT': lambda x: not _truth(x),
+    'INDEX': _index,
+    'MATCH': _match,
+    'VLOOKUP': _vlookup,
+    'CHOOSE': _choose,
+}
+
+_GLOBALS = {'__builtins__': {}, '_range': _range, '_num': _num, '_truth': _truth, '_compare': _compare,
+            '_concat': _concat, '_div': _div, '_pow': _pow, '_iferror': _iferror, **{f'_fn_{name}': func for name, func in FUNCTIONS.items()}}
+
+
+# ---- compiler ----
+
+class _Parser:
+    """Recursive-descent parser turning formula tokens into a Python expression."""
+
+    def __init__(self, formula, sheet=None):
+        from openpyxl.formula import Tokenizer
+
+        try:
+            tokens = Tokenizer(formula).items
+        except Exception as exc:
+            raise FormulaError(f'Could not tokenize {formula!r}: {exc}') from None
+        self.formula = formula
+        self.sheet = sheet
+        self.tokens = [t for t in tokens if t.type != 'WHITE-SPACE']
+        self.pos = 0
+        self.refs = set()
+
+    def error(self, message):
+        return FormulaError(f'{message} in {self.formula!r}')
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        if token is None:
+            raise self.error('Unexpected end of formula')
+        self.pos += 1
+        return token
+
+    def parse(self):
+        expr = self.expression(1)
+        if self.peek() is not None:
+            raise self.error(f'Unexpected {self.peek().value!r}')
+        return expr
+
+    def expression(self, min_precedence):
+        left = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token.type != 'OPERATOR-INFIX':
+                return left
+            precedence = _INFIX_PRECEDENCE.get(token.value)
+            if precedence is None:
+                raise self.error(f'Unsupported operator {token.value!r}')
+            if precedence < min_precedence:
+                return left
+            self.take()
+            right = self.expression(precedence + 1)
+            left = self.combine(token.value, left, right)
+
+    @staticmethod
+    def combine(op, left, right):
+        if op == '&':
+            return f'_concat({left}, {right})'
+        if op == '/':
+            return f'_div({left}, {right})'
+        if op == '^':
+            return f'_pow({left}, {right})'
+        if op in _COMPARISONS:
+            return f'_compare({left}, {right}, {op!r})'
+        return f'(_num({left}) {op} _num({right}))'
+
+    def unary(self):
+        token = self.peek()
+        if token is not None and token.type == 'OPERATOR-PREFIX':
+            self.take()
+            operand = self.unary()
+            return f'(-_num({operand}))' if token.value == '-' else operand
+        expr = self.primary()
+        while self.peek() is not None and self.peek().type == 'OPERATOR-POSTFIX':
+            self.take()
+            expr = f'(_num({expr}) / 100)'
+        return expr
+
+    def primary(self):
+        token = self.take()
+        if token.type == 'OPERAND':
+            return self.operand(token)
+        if token.type == 'PAREN' and token.subtype == 'OPEN':
+            expr = self.expression(1)
+            closing = self.take()
+            if closing.type != 'PAREN' or closing.subtype != 'CLOSE':
+                raise self.error('Expected ")"')
+            return expr
+        if token.type == 'FUNC' and token.subtype == 'OPEN':
+            return self.function(token.value[:-1].upper())
+        raise self.error(f'Unexpected {token.value!r}')
+
+    def operand(self, token):
+        if token.subtype == 'NUMBER':
+            number = float(token.value)
+            return repr(int(number)) if number.is_integer() and 'E' not in token.value.upper() else repr(number)
+        if token.subtype == 'TEXT':
+            return repr(token.value[1:-1].replace('""', '"'))
+        if token.subtype == 'LOGICAL':
+            return 'True' if token.value.upper() == 'TRUE' else 'False'
+        if token.subtype == 'RANGE':
+            return self.reference(token.value)
+        raise self.error(f'Unsupported operand {token.value!r}')
+
+    def reference(self, ref):
+        sheet, bang, cells = ref.rpartition('!')
+        if bang:
+            sheet = sheet.strip("'").replace("''", "'")
+            if self.sheet is None:
+                raise self.error(f'Sheet-qualified reference {ref!r} with no sheet name to check it against')
+            if sheet.lower() != self.sheet.lower():
+                raise self.error(f'Reference to another sheet {ref!r}')
+        rows = expand_range(cells)
+        for row in rows:
+            self.refs.update(row)
+        if ':' not in cells:
+            # A blank cell reads as None; _num, _compare and _concat give it Excel's meaning
+            return f'v.get({rows[0][0]!r})'
+        return f'_range(v, {rows!r})'
+
+    def arguments(self):
+        args = []
+        token = self.peek()
+        if token is not None and token.type == 'FUNC' and token.subtype == 'CLOSE':
+            self.take()
+            return args
+        while True:
+            args.append(self.expression(1))
+            token = self.take()
+            if token.type == 'FUNC' and token.subtype == 'CLOSE':
+                return args
+            if token.type != 'SEP' or token.subtype != 'ARG':
+                raise self.error(f'Unexpected {token.value!r} in function arguments')
+
+    def function(self, name):
+        args = self.arguments()
+        if name == 'IF':
+            if not 2 <= len(args) <= 3:
+                raise self.error('IF takes 2 or 3 arguments')
+            return f'({args[1]} if _truth({args[0]}) else {args[2] if len(args) == 3 else "False"})'
+        if name == 'IFERROR':
+            if len(args) != 2:
+                raise self.error('IFERROR takes 2 arguments')
+            return f'_iferror(lambda: {args[0]}, lambda: {args[1]})'
+        if name not in FUNCTIONS:
+            raise self.error(f'Unsupported function {name}')
+        return f'_fn_{name}({", ".join(args)})'
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_formula(formula, sheet=None):
+    """Compile ``formula`` (with its leading ``=``) into ``(func, precedents)``.
+
+    ``func(values)`` evaluates it against a ``{coordinate: value}`` mapping;
+    ``precedents`` is the frozenset of cells it reads.
+    """
+    parser = _Parser(formula, sheet)
+    source = parser.parse()
+    func = eval(compile(f'lambda v: {source}', f'<formula {formula}>', 'eval'), _GLOBALS)
+    return func, frozenset(parser.refs)
+
+
+def is_formula(value):
+    return isinstance(value, str) and value.startswith('=') and len(value) > 1
+
+
+class FormulaGraph:
+    """The formulas of one sheet, compiled and ordered by their dependencies.
+
+    ``cells`` maps A1 coordinates to values; strings starting with ``=``
+    are formulas. Every formula is evaluated on construction; :attr:`values`
+    then holds the value of every cell.
+    """
+
+    def __init__(self, cells, sheet=None):
+        self.formulas = {coord: value for coord, value in cells.items() if is_formula(value)}
+        self.values = {coord: value for coord, value in cells.items()
+                       if value is not None and coord not in self.formulas}
+        self._funcs = {}
+        self.precedents = {}
+        for coord, formula in self.formulas.items():
+            try:
+                self._funcs[coord], self.precedents[coord] = compile_formula(formula, sheet)
+            except FormulaError as exc:
+                raise FormulaError(f'{coord}: {exc}') from None
+        self.dependents = {}
+        for coord, refs in self.precedents.items():
+            for ref in refs:
+                self.dependents.setdefault(ref, set()).add(coord)
+        self.order = self._topological_order()
+        self._position = {coord: i for i, coord in enumerate(self.order)}
+        self.evaluate()
+
+    def _topological_order(self):
+        pending = {coord: sum(1 for ref in refs if ref in self.formulas) for coord, refs in self.precedents.items()}
+        ready = sorted(coord for coord, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            coord = ready.pop()
+            order.append(coord)
+            for dependent in self.dependents.get(coord, ()):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.formulas):
+            cycle = sorted(set(self.formulas) - set(order))
+            raise FormulaError(f'Circular reference between {", ".join(cycle[:10])}')
+        return order
+
+    def _compute(self, coord):
+        try:
+            value = self._funcs[coord](self.values)
+        except Exception as exc:
+            upstream = next((self.values[ref] for ref in sorted(self.precedents[coord])
+                             if isinstance(self.values.get(ref), CellError)), None)
+            value = upstream or CellError(next((code for kind, code in _ERROR_CODES if isinstance(exc, kind)),
+                                               '#VALUE!'))
+        if isinstance(value, _Range):
+            value = CellError('#VALUE!')
+        elif value is None:
+            value = 0  # a formula showing a blank cell shows 0
+        self.values[coord] = value
+        return value
+
+    def evaluate(self):
+        """Recompute every formula in dependency order and return :attr:`values`."""
+        for coord in self.order:
+            self._compute(coord)
+        return self.values
+
+    def affected(self, coords):
+        """Formula cells that depend, directly or not, on any of ``coords``, in evaluation order."""
+        seen = set()
+        stack = list(coords)
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return sorted(seen, key=self._position.__getitem__)
+
+    def set(self, changes):
+        """Change input cells and recompute only their dependents; returns ``{cell: new value}``."""
+        for coord, value in changes.items():
+            if coord in self.formulas:
+                raise FormulaError(f'{coord} holds a formula; only input cells can be set')
+            if value is None:
+                self.values.pop(coord, None)
+            else:
+                self.values[coord] = value
+        return {coord: self._compute(coord) for coord in self.affected(changes)}
+
+    def __getitem__(self, coord):
+        return self.values.get(coord)
+
+
+def sheet_cells(rows, min_row=1, min_col=1):
+    """``{coordinate: value}`` of the non-empty cells in ``rows`` (as from ``iter_rows(values_only=True)``)."""
+    cells = {}
+    for r, row in enumerate(rows, start=min_row):
+        for c, value in enumerate(row, start=min_col):
+            if value is not None:
+                # Array formulas come back as objects holding the formula text
+                cells[f'{column_letters(c)}{r}'] = getattr(value, 'text', value)
+    return cells
+
@@ -0,0 +1,151 @@
+"""Load generator for the JSON sizing API.
+
+Fires single (or bulk) sizing requests at a running ``api.py`` from a
+pool of keep-alive connections and reports latency percentiles and
+throughput::
+
+    python loadtest.py --spawn --concurrency 16 --duration 10
+    python loadtest.py --url http://127.0.0.1:8502 --bulk 500
+"""
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+def _payload(rng, bulk):
+    if not bulk:
+        return '/size', {'flow_gpm': round(rng.uniform(5, 600), 1),
+                         'line_type': rng.choice(('Suction', 'Return'))}
+    return '/size/bulk', {'lines': [
+        {'line_id': f'L{i}', 'flow_gpm': round(rng.uniform(5, 600), 1),
+         'line_type': rng.choice(('Suction', 'Return'))}
+        for i in range(bulk)
+    ]}
+
+
+def _worker(host, port, deadline, max_requests, bulk, seed, latencies, errors, counter, lock):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    # Pre-encode a small pool of bodies so the generator isn't the bottleneck
+    bodies = [(path, json.dumps(body).encode('utf-8')) for path, body in (_payload(rng, bulk) for _ in range(64))]
+    i = 0
+    while time.perf_counter() < deadline:
+        with lock:
+            if max_requests and counter[0] >= max_requests:
+                break
+            counter[0] += 1
+        path, body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(1)
+    conn.close()
+
+
+def _wait_for_health(host, port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f'API at {host}:{port} did not become healthy within {timeout:.0f}s')
+
+
+def run(url, concurrency=8, duration=10.0, requests=0, bulk=0, warmup=1.0):
+    """Run the load test and return a dict of summary statistics."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+
+    if warmup:
+        _run_phase(host, port, concurrency, warmup, 0, bulk)
+    latencies, errors, elapsed = _run_phase(host, port, concurrency, duration, requests, bulk)
+    lat_ms = np.asarray(latencies) * 1000
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'bulk_lines': bulk,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'lines_per_s': round(len(latencies) * max(bulk, 1) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(float(np.percentile(lat_ms, 50)), 3) if len(lat_ms) else None,
+        'p99_ms': round(float(np.percentile(lat_ms, 99)), 3) if len(lat_ms) else None,
+        'max_ms': round(float(lat_ms.max()), 3) if len(lat_ms) else None,
+    }
+
+
+def _run_phase(host, port, concurrency, duration, requests, bulk):
+    latencies, errors, counter, lock = [], [], [0], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + (duration if not requests else float('inf'))
+    threads = [
+        threading.Thread(target=_worker, args=(host, port, deadline, requests, bulk, seed,
+                                               latencies, errors, counter, lock))
+        for seed in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the pipe sizing API.')
+    parser.add_argument('--url', default='http://127.0.0.1:8502')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run (ignored with --requests)')
+    parser.add_argument('--requests', type=int, default=0, help='stop after this many requests')
+    parser.add_argument('--bulk', type=int, default=0, help='lines per request; 0 sends single /size requests')
+    parser.add_argument('--spawn', action='store_true', help='start a local api.py for the run')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    parts = urlsplit(args.url)
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, str(Path(__file__).parent / 'api.py'),
+                                   '--host', parts.hostname, '--port', str(parts.port or 80)],
+                                  stdout=subprocess.DEVNULL)
+    try:
+        _wait_for_health(parts.hostname, parts.port or 80)
+        stats = run(args.url, args.concurrency, args.duration, args.requests, args.bulk)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        for key, value in stats.items():
+            print(f'{key:>15}: {value}')
+
+
+if __name__ == '__main__':
+    main()
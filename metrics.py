@@ -0,0 +1,193 @@
+"""Per-stage timing and counters for reruns and API requests.
+
+Disabled unless ``PIPE_SIZING_METRICS=1`` is set (or :func:`enable` is
+called); when disabled :func:`stage` and :func:`incr` return straight
+away, so instrumented code pays only a function call.
+
+When enabled, the app shows a debug panel with ``?debug=1`` in the URL,
+and ``PIPE_SIZING_METRICS_PORT`` starts a Prometheus text endpoint at
+``/metrics`` in the Streamlit process. The JSON API serves the same
+format at ``GET /metrics``.
+"""
+import collections
+import contextlib
+import os
+import threading
+import time
+
+_enabled = os.environ.get('PIPE_SIZING_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+_lock = threading.Lock()
+_counters = collections.Counter()
+_stages = {}  # stage name -> [count, total seconds, max seconds]
+_caches = {}  # cache name -> functools.lru_cache-wrapped function
+_recent = collections.deque(maxlen=50)  # (timestamp, {stage: seconds}) per completed rerun
+_local = threading.local()
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+_server = None
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Turn collection on or off for this process."""
+    global _enabled
+    _enabled = bool(on)
+
+
+def reset():
+    """Clear every counter, stage timing and recent rerun."""
+    with _lock:
+        _counters.clear()
+        _stages.clear()
+        _recent.clear()
+
+
+def incr(name, n=1):
+    """Add ``n`` to the counter ``name``."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += n
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            entry = _stages.get(self.name)
+            if entry is None:
+                _stages[self.name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+        current = getattr(_local, 'rerun', None)
+        if current is not None:
+            current[self.name] = current.get(self.name, 0.0) + elapsed
+        return False
+
+
+def stage(name):
+    """Context manager timing one stage of the current rerun or request."""
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _Stage(name)
+
+
+@contextlib.contextmanager
+def rerun(counter='reruns'):
+    """Wrap a script or fragment run; its per-stage breakdown is kept for the debug panel.
+
+    A fragment run inside a full script run is part of that run, not a new one.
+    """
+    if not _enabled or getattr(_local, 'rerun', None) is not None:
+        yield
+        return
+    _local.rerun = {}
+    incr(counter)
+    try:
+        with _Stage('total'):
+            yield
+    finally:
+        breakdown, _local.rerun = _local.rerun, None
+        with _lock:
+            _recent.append((time.time(), breakdown))
+
+
+def register_cache(name, func):
+    """Report hits/misses of an ``functools.lru_cache``-wrapped ``func`` as cache ``name``."""
+    _caches[name] = func
+
+
+def snapshot():
+    """Return counters, stage totals, cache stats and recent reruns as plain data."""
+    caches = {}
+    for name, func in list(_caches.items()):
+        info = func.cache_info()
+        caches[name] = {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
+        if hasattr(info, 'nbytes'):
+            caches[name]['bytes'] = info.nbytes
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'stages': {name: {'count': c, 'total_s': t, 'max_s': m} for name, (c, t, m) in _stages.items()},
+            'caches': caches,
+            'recent': list(_recent),
+        }
+
+
+def prometheus_text(prefix='pipe_sizing'):
+    """Render :func:`snapshot` in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = [f'# HELP {prefix}_enabled Whether metrics collection is on.',
+             f'# TYPE {prefix}_enabled gauge',
+             f'{prefix}_enabled {int(_enabled)}']
+    for name, value in sorted(snap['counters'].items()):
+        lines += [f'# TYPE {prefix}_{name}_total counter', f'{prefix}_{name}_total {value}']
+    if snap['stages']:
+        lines += [f'# HELP {prefix}_stage_seconds Time spent per rerun/request stage.',
+                  f'# TYPE {prefix}_stage_seconds summary']
+        for name, s in sorted(snap['stages'].items()):
+            lines += [f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["total_s"]:.6f}',
+                      f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}']
+        lines.append(f'# TYPE {prefix}_stage_seconds_max gauge')
+        lines += [f'{prefix}_stage_seconds_max{{stage="{name}"}} {s["max_s"]:.6f}'
+                  for name, s in sorted(snap['stages'].items())]
+    if snap['caches']:
+        lines.append(f'# TYPE {prefix}_cache_hits_total counter')
+        lines += [f'{prefix}_cache_hits_total{{cache="{n}"}} {c["hits"]}' for n, c in sorted(snap['caches'].items())]
+        lines.append(f'# TYPE {prefix}_cache_misses_total counter')
+        lines += [f'{prefix}_cache_misses_total{{cache="{n}"}} {c["misses"]}' for n, c in sorted(snap['caches'].items())]
+        lines.append(f'# TYPE {prefix}_cache_entries gauge')
+        lines += [f'{prefix}_cache_entries{{cache="{n}"}} {c["size"]}' for n, c in sorted(snap['caches'].items())]
+        sized = sorted((n, c['bytes']) for n, c in snap['caches'].items() if 'bytes' in c)
+        if sized:
+            lines.append(f'# TYPE {prefix}_cache_bytes gauge')
+            lines += [f'{prefix}_cache_bytes{{cache="{n}"}} {b}' for n, b in sized]
+    return '\n'.join(lines) + '\n'
+
+
+def maybe_start_server():
+    """Serve ``/metrics`` on ``PIPE_SIZING_METRICS_PORT`` from a daemon thread, once per process."""
+    global _server
+    port = os.environ.get('PIPE_SIZING_METRICS_PORT')
+    if not _enabled or not port:
+        return None
+    with _lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _server = ThreadingHTTPServer((os.environ.get('PIPE_SIZING_METRICS_HOST', '127.0.0.1'), int(port)), Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return _server
@@ -0,0 +1,402 @@
+"""Flow split and head loss in looped and branched pipe networks.
+
+A network is a list of nodes and segments. Nodes either draw or inject a
+flow (``demand_gpm``, positive out of the network, negative into it) or
+hold a fixed head (``head_ft``, e.g. the pool surface at a drain, skimmer
+or return inlet). Segments join two nodes with a catalog nominal size, a
+length and optional fittings, and are checked against the Suction/Return
+velocity limits of their line type.
+
+The solver is the global gradient (Newton) method: each iteration solves
+one sparse symmetric system for the junction heads, with Darcy-Weisbach
+losses and Colebrook friction factors from :mod:`hydraulics` for all
+segments at once. ``scipy.sparse`` is used when installed, a dense NumPy
+solve otherwise (fine for a few hundred nodes). :meth:`PipeNetwork.resize`
+swaps one segment's size and :meth:`PipeNetwork.solve` can warm-start from
+a previous solution, so a size change re-solves in a couple of iterations.
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from hydraulics import FITTING_LD, G_FT_S2, LAMINAR_RE, fittings_ld, friction_factor
+from sizing import STATUS_LABELS, line_limits, normalize_line_type, pipe_area, status_codes
+
+# Newton iterations stop once no segment flow moves by more than this (gpm)
+DEFAULT_TOL_GPM = 1e-4
+
+# Floor on dh/dQ so zero-flow segments don't make the head system singular
+_MIN_GRADIENT = 1e-8
+
+
+class NetworkError(ValueError):
+    """Raised for networks that cannot be solved (bad references, no fixed head, ...)."""
+
+
+@dataclass(frozen=True)
+class Node:
+    id: str
+    demand_gpm: float = 0.0
+    head_ft: float = None  # fixed head; demand is ignored when set
+
+
+@dataclass(frozen=True)
+class Segment:
+    id: str
+    start: str
+    end: str
+    nominal_in: float
+    length_ft: float
+    line_type: str = 'Return'
+    fittings: tuple = ()  # ((fitting name, count), ...) from hydraulics.FITTING_LD
+
+
+@dataclass(frozen=True, eq=False)
+class NetworkSolution:
+    """Per-segment and per-node results; positive flow runs from ``start`` to ``end``."""
+    segment_ids: tuple
+    node_ids: tuple
+    flow_gpm: np.ndarray
+    velocity_fps: np.ndarray
+    head_loss_ft: np.ndarray
+    status: np.ndarray
+    head_ft: np.ndarray
+    iterations: int
+    converged: bool
+
+    def segments_frame(self, network):
+        """Segment results as a DataFrame, in input order."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            'Segment': self.segment_ids,
+            'From': [s.start for s in network.segments],
+            'To': [s.end for s in network.segments],
+            'Line Type': [s.line_type for s in network.segments],
+            'Nominal (in)': network.nominal_in,
+            'Flow (gpm)': self.flow_gpm.round(2),
+            'Velocity (ft/s)': self.velocity_fps.round(2),
+            'Head Loss (ft)': self.head_loss_ft.round(3),
+            'Status': np.take(STATUS_LABELS, self.status),
+        })
+
+    def nodes_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({'Node': self.node_ids, 'Head (ft)': self.head_ft.round(3)})
+
+
+class PipeNetwork:
+    """A network compiled to arrays against a pipe catalog."""
+
+    def __init__(self, nodes, segments, catalog):
+        self.nodes = tuple(nodes)
+        self.segments = tuple(segments)
+        self.catalog = catalog
+        index = {}
+        for i, node in enumerate(self.nodes):
+            if node.id in index:
+                raise NetworkError(f'Duplicate node id {node.id!r}')
+            index[node.id] = i
+        if len({s.id for s in self.segments}) != len(self.segments):
+            raise NetworkError('Segment ids must be unique')
+        if not self.segments:
+            raise NetworkError('The network has no segments')
+
+        try:
+            self.start = np.array([index[s.start] for s in self.segments], dtype=np.intp)
+            self.end = np.array([index[s.end] for s in self.segments], dtype=np.intp)
+        except KeyError as exc:
+            raise NetworkError(f'Segment refers to unknown node {exc.args[0]!r}') from None
+        if np.any(self.start == self.end):
+            raise NetworkError('A segment cannot start and end at the same node')
+
+        self.fixed = np.array([n.head_ft is not None for n in self.nodes])
+        self.fixed_head = np.array([n.head_ft if n.head_ft is not None else np.nan for n in self.nodes],
+                                   dtype=np.float64)
+        self.demand_cfs = (np.array([0.0 if n.head_ft is not None else n.demand_gpm for n in self.nodes],
+                                    dtype=np.float64) * catalog.gal_to_ft3 / catalog.sec_per_min)
+        # Junction (unknown head) numbering, -1 for fixed-head nodes
+        self.junction = np.full(len(self.nodes), -1, dtype=np.intp)
+        self.junction[~self.fixed] = np.arange(int((~self.fixed).sum()))
+        self._check_fixed_heads()
+
+        self.line_types = tuple(normalize_line_type(s.line_type) or 'Return' for s in self.segments)
+        limits = np.array([line_limits(t) for t in self.line_types], dtype=np.float64)
+        self.design_limit, self.line_limit = limits[:, 0], limits[:, 1]
+        self.length_ft = np.array([s.length_ft for s in self.segments], dtype=np.float64)
+        self.fittings_ld = np.array([fittings_ld(s.fittings) for s in self.segments], dtype=np.float64)
+        self.nominal_in = np.array([s.nominal_in for s in self.segments], dtype=np.float64)
+        n = len(self.segments)
+        self.inner_ft, self.area_ft2 = np.empty(n), np.empty(n)
+        self.rel_roughness, self.loss_length_ft = np.empty(n), np.empty(n)
+        self._set_geometry(np.arange(n))
+
+    def _check_fixed_heads(self):
+        """Every connected part of the network needs a fixed-head node, or its heads are undefined."""
+        parent = np.arange(len(self.nodes))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for a, b in zip(self.start.tolist(), self.end.tolist()):
+            parent[find(a)] = find(b)
+        roots = np.array([find(i) for i in range(len(self.nodes))])
+        anchored = set(roots[self.fixed].tolist())
+        floating = sorted({self.nodes[i].id for i in range(len(self.nodes)) if roots[i] not in anchored})
+        if floating:
+            raise NetworkError('These nodes are not connected to any fixed-head node: ' + ', '.join(floating[:10]))
+
+    def _set_geometry(self, which):
+        """(Re)compute the inner diameter and loss constants of the segments in ``which``."""
+        catalog_nominal = self.catalog.nominal_in
+        for i in np.atleast_1d(which).tolist():
+            match = np.flatnonzero(np.isclose(catalog_nominal, self.nominal_in[i]))
+            if not len(match):
+                raise NetworkError(f'Segment {self.segments[i].id!r}: {self.nominal_in[i]:g} in is not in the catalog')
+            inner_in = float(self.catalog.inner_in[match[0]])
+            self.inner_ft[i] = inner_in / 12
+            self.area_ft2[i] = pipe_area(inner_in, self.catalog.pi)
+            self.rel_roughness[i] = self.catalog.roughness_ft / self.inner_ft[i]
+            self.loss_length_ft[i] = self.length_ft[i] + self.fittings_ld[i] * self.inner_ft[i]
+
+    def resize(self, segment_id, nominal_in):
+        """A copy of the network with one segment changed to ``nominal_in``; only that segment is recompiled."""
+        try:
+            i = next(k for k, s in enumerate(self.segments) if s.id == segment_id)
+        except StopIteration:
+            raise NetworkError(f'Unknown segment {segment_id!r}') from None
+        other = object.__new__(PipeNetwork)
+        other.__dict__.update(self.__dict__)
+        segments = list(self.segments)
+        segments[i] = replace(segments[i], nominal_in=float(nominal_in))
+        other.segments = tuple(segments)
+        for name in ('nominal_in', 'inner_ft', 'area_ft2', 'rel_roughness', 'loss_length_ft'):
+            setattr(other, name, getattr(self, name).copy())
+        other.nominal_in[i] = float(nominal_in)
+        other._set_geometry(i)
+        return other
+
+    def update(self, nodes, segments):
+        """This network with new ``nodes``/``segments``: resized in place of a recompile when only sizes changed."""
+        nodes, segments = tuple(nodes), tuple(segments)
+        if nodes != self.nodes or len(segments) != len(self.segments) or any(
+                replace(old, nominal_in=new.nominal_in) != new for old, new in zip(self.segments, segments)):
+            return PipeNetwork(nodes, segments, self.catalog)
+        network = self
+        for old, new in zip(self.segments, segments):
+            if old.nominal_in != new.nominal_in:
+                network = network.resize(new.id, new.nominal_in)
+        return network
+
+    def _head_loss(self, flow_cfs):
+        """Head loss (ft) along each segment and its derivative with respect to flow."""
+        velocity = flow_cfs / self.area_ft2
+        re = np.abs(velocity) * self.inner_ft / self.catalog.nu
+        f = friction_factor(re, self.rel_roughness)
+        k = f * self.loss_length_ft / (self.inner_ft * 2 * G_FT_S2 * self.area_ft2 ** 2)
+        # Loss goes as Q|Q| in turbulent flow but is linear in Q when laminar
+        exponent = np.where(re < LAMINAR_RE, 1.0, 2.0)
+        return k * flow_cfs * np.abs(flow_cfs), np.maximum(exponent * k * np.abs(flow_cfs), _MIN_GRADIENT)
+
+    def _solve_heads(self, weights, rhs):
+        """Solve ``A21 diag(weights) A12 x = rhs`` for the junction heads."""
+        n = len(rhs)
+        js, je = self.junction[self.start], self.junction[self.end]
+        rows, cols, vals = [], [], []
+        for a, b, sign in ((js, js, 1.0), (je, je, 1.0), (js, je, -1.0), (je, js, -1.0)):
+            keep = (a >= 0) & (b >= 0)
+            rows.append(a[keep])
+            cols.append(b[keep])
+            vals.append(sign * weights[keep])
+        rows, cols, vals = np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+        try:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.linalg import spsolve
+        except ImportError:
+            matrix = np.zeros((n, n))
+            np.add.at(matrix, (rows, cols), vals)
+            return np.linalg.solve(matrix, rhs)
+        return spsolve(csr_matrix((vals, (rows, cols)), shape=(n, n)), rhs)
+
+    def solve(self, initial=None, tol_gpm=DEFAULT_TOL_GPM, max_iter=50):
+        """Solve flows and heads; ``initial`` is a previous :class:`NetworkSolution` to warm-start from."""
+        to_cfs = self.catalog.gal_to_ft3 / self.catalog.sec_per_min
+        if initial is not None and len(initial.flow_gpm) == len(self.segments):
+            flow = initial.flow_gpm * to_cfs
+        else:
+            # Start every segment at ~3 ft/s in its nominal direction
+            flow = 3.0 * self.area_ft2
+        head = np.where(self.fixed, self.fixed_head, 0.0)
+        fixed_term = np.where(self.fixed[self.start], -self.fixed_head[self.start], 0.0) + \
+            np.where(self.fixed[self.end], self.fixed_head[self.end], 0.0)
+        junctions = ~self.fixed
+        js, je = self.junction[self.start], self.junction[self.end]
+        n_junctions = int(junctions.sum())
+
+        def a21(values):
+            """Net inflow per junction of a per-segment quantity."""
+            out = np.zeros(n_junctions)
+            np.add.at(out, je[je >= 0], values[je >= 0])
+            np.subtract.at(out, js[js >= 0], values[js >= 0])
+            return out
+
+        def a12(junction_heads):
+            """Head at end minus head at start, from junction heads only."""
+            h = np.zeros(len(self.nodes))
+            h[junctions] = junction_heads
+            h[self.fixed] = 0.0
+            return h[self.end] - h[self.start]
+
+        converged = False
+        tol = tol_gpm * to_cfs
+        iterations = 0
+        for iterations in range(1, max_iter + 1):
+            loss, gradient = self._head_loss(flow)
+            # Energy residual per segment: loss + H_end - H_start (fixed heads included)
+            f1 = loss + a12(head[junctions]) + fixed_term
+            f2 = a21(flow) - self.demand_cfs[junctions]
+            inv = 1.0 / gradient
+            delta_head = self._solve_heads(inv, f2 - a21(inv * f1)) if n_junctions else np.zeros(0)
+            delta_flow = -inv * (f1 + a12(delta_head))
+            flow = flow + delta_flow
+            head[junctions] += delta_head
+            if np.max(np.abs(delta_flow)) <= tol:
+                converged = True
+                break
+
+        loss, _ = self._head_loss(flow)
+        velocity = flow / self.area_ft2
+        return NetworkSolution(
+            segment_ids=tuple(s.id for s in self.segments),
+            node_ids=tuple(n.id for n in self.nodes),
+            flow_gpm=flow / to_cfs,
+            velocity_fps=velocity,
+            head_loss_ft=loss,
+            status=status_codes(np.abs(velocity), self.design_limit, self.line_limit),
+            head_ft=head,
+            iterations=iterations,
+            converged=converged,
+        )
+
+
+def example_pool_network():
+    """A small pool system: drains and skimmers into a suction header, and a looped return manifold."""
+    nodes = [
+        Node('Pool (drains)', head_ft=0.0),
+        Node('Pool (skimmer 1)', head_ft=0.0),
+        Node('Pool (skimmer 2)', head_ft=0.0),
+        Node('Drain tee'),
+        Node('Suction header'),
+        Node('Pump inlet', demand_gpm=100.0),
+        Node('Pump outlet', demand_gpm=-100.0),
+        Node('Return manifold A'),
+        Node('Return manifold B'),
+        Node('Return 1', head_ft=0.0),
+        Node('Return 2', head_ft=0.0),
+        Node('Return 3', head_ft=0.0),
+        Node('Return 4', head_ft=0.0),
+    ]
+    elbows = (('90° elbow', 2),)
+    segments = [
+        Segment('MD', 'Pool (drains)', 'Drain tee', 2.0, 40, 'Suction', elbows),
+        Segment('SK1', 'Pool (skimmer 1)', 'Suction header', 2.0, 35, 'Suction', elbows),
+        Segment('SK2', 'Pool (skimmer 2)', 'Suction header', 2.0, 55, 'Suction', elbows),
+        Segment('DT', 'Drain tee', 'Suction header', 2.5, 10, 'Suction'),
+        Segment('SH', 'Suction header', 'Pump inlet', 3.0, 8, 'Suction', (('Ball valve', 1),)),
+        Segment('PO', 'Pump outlet', 'Return manifold A', 2.0, 15, 'Return', (('Swing check valve', 1),)),
+        Segment('RMA', 'Return manifold A', 'Return manifold B', 2.0, 60, 'Return'),
+        Segment('RMB', 'Return manifold B', 'Pump outlet', 2.0, 70, 'Return'),
+        Segment('R1', 'Return manifold A', 'Return 1', 1.5, 25, 'Return', elbows),
+        Segment('R2', 'Return manifold A', 'Return 2', 1.5, 45, 'Return', elbows),
+        Segment('R3', 'Return manifold B', 'Return 3', 1.5, 30, 'Return', elbows),
+        Segment('R4', 'Return manifold B', 'Return 4', 1.5, 50, 'Return', elbows),
+    ]
+    return nodes, segments
+
+
+# Column layout of the editable node and segment tables in the app
+NODE_COLUMNS = ['Node', 'Demand (gpm)', 'Fixed head (ft)']
+SEGMENT_COLUMNS = ['Segment', 'From', 'To', 'Nominal (in)', 'Length (ft)', 'Line Type', 'Fittings']
+
+
+def format_fittings(fittings):
+    """``(('90° elbow', 2), ('Ball valve', 1))`` as ``'2 x 90° elbow; 1 x Ball valve'``."""
+    return '; '.join(f'{count} x {name}' for name, count in fittings if count)
+
+
+def parse_fittings(text):
+    """Inverse of :func:`format_fittings`; a bare name counts once."""
+    fittings = {}
+    for part in str(text or '').split(';'):
+        part = part.strip()
+        if not part or part.lower() == 'nan':
+            continue
+        count, sep, name = part.partition(' x ')
+        if not sep:
+            count, name = '1', part
+        name = name.strip()
+        if name not in FITTING_LD:
+            raise NetworkError(f'Unknown fitting {name!r}; expected one of {", ".join(FITTING_LD)}')
+        try:
+            fittings[name] = fittings.get(name, 0) + int(count)
+        except ValueError:
+            raise NetworkError(f'Bad fitting count in {part!r}') from None
+    return tuple(fittings.items())
+
+
+def network_frames(nodes, segments):
+    """Node and segment tables for :data:`NODE_COLUMNS` / :data:`SEGMENT_COLUMNS`."""
+    import pandas as pd
+
+    node_frame = pd.DataFrame([(n.id, None if n.head_ft is not None else n.demand_gpm, n.head_ft)
+                               for n in nodes], columns=NODE_COLUMNS)
+    segment_frame = pd.DataFrame([(s.id, s.start, s.end, s.nominal_in, s.length_ft, s.line_type,
+                                   format_fittings(s.fittings)) for s in segments],
+                                 columns=SEGMENT_COLUMNS)
+    return node_frame, segment_frame
+
+
+def network_from_frames(node_frame, segment_frame):
+    """Parse the node and segment tables back into :class:`Node` and :class:`Segment` lists.
+
+    Blank rows are skipped; other bad values raise :class:`NetworkError`.
+    """
+    def number(value, what, default=None):
+        if value is None or (isinstance(value, float) and np.isnan(value)) or str(value).strip() == '':
+            if default is None:
+                raise NetworkError(f'{what} is missing')
+            return default
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise NetworkError(f'{what} must be a number, got {value!r}') from None
+
+    nodes = []
+    for row in node_frame[NODE_COLUMNS].itertuples(index=False):
+        node_id, demand, head = row
+        if node_id is None or str(node_id).strip() in ('', 'nan', 'None'):
+            continue
+        node_id = str(node_id).strip()
+        has_head = not (head is None or (isinstance(head, float) and np.isnan(head)) or str(head).strip() == '')
+        nodes.append(Node(node_id,
+                          demand_gpm=number(demand, f'Demand of node {node_id!r}', 0.0),
+                          head_ft=number(head, f'Fixed head of node {node_id!r}') if has_head else None))
+
+    segments = []
+    for row in segment_frame[SEGMENT_COLUMNS].itertuples(index=False):
+        segment_id, start, end, nominal, length, line_type, fittings = row
+        if segment_id is None or str(segment_id).strip() in ('', 'nan', 'None'):
+            continue
+        segment_id = str(segment_id).strip()
+        line_type = normalize_line_type(line_type)
+        if line_type is None:
+            raise NetworkError(f'Segment {segment_id!r}: line type must be Suction or Return')
+        segments.append(Segment(segment_id, str(start).strip(), str(end).strip(),
+                                number(nominal, f'Nominal size of segment {segment_id!r}'),
+                                number(length, f'Length of segment {segment_id!r}'),
+                                line_type, parse_fittings(fittings)))
+    return nodes, segments
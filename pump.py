@@ -0,0 +1,165 @@
+"""Pump curve vs system curve operating points for every pipe size.
+
+A pump curve is a handful of (gpm, head ft) points. The system curve of
+each catalog size is the static head plus the Darcy-Weisbach loss over
+the run (see :mod:`hydraulics`). Both are evaluated on one dense flow
+grid for all sizes at once; the operating point is the first crossing
+of pump head below system head, refined by linear interpolation between
+the two bracketing grid points.
+
+Pump curves can be typed into the app or uploaded as a two-column
+CSV/XLSX (flow in gpm, head in ft).
+"""
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+
+from hydraulics import REFERENCE_LENGTH_FT, friction_losses
+from sizing import MIN_NOMINAL_IN, STATUS_LABELS, size_catalog, status_codes
+from uploads import match_columns, read_table
+
+# Flow grid resolution for the crossing search; the interpolated root is far finer
+SWEEP_POINTS = 2001
+
+# A typical 1.5 HP single-speed pool pump, (gpm, ft of head)
+EXAMPLE_PUMP_CURVE = ((0, 60), (20, 57), (40, 53), (60, 47), (80, 40), (100, 31), (120, 20), (135, 10))
+
+PUMP_CURVE_COLUMNS = ['Flow (gpm)', 'Head (ft)']
+
+# Accepted header spellings (lower-cased, stripped) for an uploaded pump curve
+_COLUMN_ALIASES = {
+    'flow_gpm': ('flow (gpm)', 'flow_gpm', 'flow', 'gpm', 'q'),
+    'head_ft': ('head (ft)', 'head_ft', 'head', 'tdh', 'tdh (ft)', 'ft'),
+}
+
+
+class PumpCurveError(ValueError):
+    """Raised for pump curves that cannot be used (too few points, rising head, ...)."""
+
+
+def pump_curve(points):
+    """Validate (gpm, head) points and return them as two sorted float arrays."""
+    points = np.asarray([(float(q), float(h)) for q, h in points if np.isfinite(q) and np.isfinite(h)],
+                        dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        raise PumpCurveError('A pump curve needs at least two (gpm, head) points.')
+    points = points[np.argsort(points[:, 0], kind='stable')]
+    flow, head = points[:, 0], points[:, 1]
+    if np.any(flow < 0) or np.any(np.diff(flow) <= 0):
+        raise PumpCurveError('Pump curve flows must be non-negative and distinct.')
+    if np.any(np.diff(head) > 0):
+        raise PumpCurveError('Pump curve head must not rise with flow.')
+    return flow, head
+
+
+def read_pump_curve(file, name=None):
+    """Read (gpm, head) points from a CSV/XLSX with flow and head columns.
+
+    Headers are matched with :func:`uploads.match_columns`; without
+    recognised headers the first two columns are used.
+    """
+    import pandas as pd
+
+    raw = read_table(file, name, 'Pump curve', PumpCurveError)
+    if raw.shape[1] < 2:
+        raise PumpCurveError('Pump curve needs a flow (gpm) and a head (ft) column.')
+
+    columns = list(match_columns(raw, _COLUMN_ALIASES).values())
+    if None in columns:
+        columns = list(raw.columns[:2])
+    flow = pd.to_numeric(raw[columns[0]], errors='coerce').to_numpy(np.float64)
+    head = pd.to_numeric(raw[columns[1]], errors='coerce').to_numpy(np.float64)
+    points = tuple(zip(flow.tolist(), head.tolist()))
+    pump_curve(points)
+    return tuple((q, h) for q, h in points if np.isfinite(q) and np.isfinite(h))
+
+
+@dataclass(frozen=True, eq=False)
+class OperatingPoints:
+    """Operating point per size (NaN where the pump can't overcome the static head)."""
+    nominal_in: np.ndarray
+    flow_gpm: np.ndarray
+    head_ft: np.ndarray
+    velocity_fps: np.ndarray
+    status: np.ndarray
+    design_limit: float
+    line_limit: float
+    # Curves on a coarse grid, for plotting
+    curve_flow_gpm: np.ndarray
+    pump_head_ft: np.ndarray
+    system_head_ft: np.ndarray  # (n_flows, n_sizes)
+
+    def frame(self):
+        """One row per size: operating flow, head, velocity and status."""
+        import pandas as pd
+
+        found = ~np.isnan(self.flow_gpm)
+        return pd.DataFrame({
+            'Nominal (in)': self.nominal_in,
+            'Flow (gpm)': self.flow_gpm,
+            'Head (ft)': self.head_ft,
+            'Velocity (ft/s)': self.velocity_fps,
+            'Status': [STATUS_LABELS[code] if ok else 'No flow' for code, ok in
+                       zip(self.status.tolist(), found.tolist())],
+        })
+
+
+def system_heads(catalog, flow_gpm, line_type, static_head_ft=0.0, run_length_ft=REFERENCE_LENGTH_FT,
+                 fittings=None, sizes=None):
+    """System head (ft) for flows × sizes: static head plus friction over the run and fittings."""
+    result = size_catalog(catalog, flow_gpm, line_type, sizes)
+    losses = friction_losses(result, run_length_ft, fittings, roughness_ft=catalog.roughness_ft)
+    return static_head_ft + losses.total, result
+
+
+def operating_points(catalog, line_type, points, static_head_ft=0.0, run_length_ft=REFERENCE_LENGTH_FT,
+                     fittings=None, sweep_points=SWEEP_POINTS, plot_points=60):
+    """Operating point of the pump on every sized catalog pipe (nominal >= MIN_NOMINAL_IN)."""
+    pump_flow, pump_head = pump_curve(points)
+    sized = catalog.nominal_in >= MIN_NOMINAL_IN
+
+    grid = np.linspace(0.0, pump_flow[-1], sweep_points)
+    system, result = system_heads(catalog, grid, line_type, static_head_ft, run_length_ft, fittings, sized)
+    margin = np.interp(grid, pump_flow, pump_head)[:, None] - system  # falls with flow
+
+    # First grid point where the pump no longer beats the system, per size
+    below = margin <= 0
+    crossed = below.any(axis=0) & (margin[0] > 0)
+    hi = np.where(crossed, below.argmax(axis=0), 1)
+    lo = hi - 1
+    cols = np.arange(system.shape[1])
+    m_lo, m_hi = margin[lo, cols], margin[hi, cols]
+    t = np.divide(m_lo, m_lo - m_hi, out=np.zeros_like(m_lo), where=m_lo != m_hi)
+    flow = np.where(crossed, grid[lo] + t * (grid[hi] - grid[lo]), np.nan)
+    # Pump still ahead at its last point: it runs out at the end of its curve
+    runout = ~below.any(axis=0) & (margin[0] > 0)
+    flow = np.where(runout, pump_flow[-1], flow)
+
+    head = np.interp(np.nan_to_num(flow), pump_flow, pump_head)
+    head = np.where(np.isnan(flow), np.nan, head)
+    velocity = np.where(np.isnan(flow), np.nan, np.nan_to_num(flow) * catalog.gal_to_ft3 / catalog.sec_per_min
+                        / result.area)
+    status = status_codes(np.nan_to_num(velocity), result.design_limit, result.line_limit)
+
+    coarse = np.linspace(0.0, pump_flow[-1], plot_points)
+    coarse_system, _ = system_heads(catalog, coarse, line_type, static_head_ft, run_length_ft, fittings, sized)
+    return OperatingPoints(
+        nominal_in=catalog.nominal_in[sized],
+        flow_gpm=flow,
+        head_ft=head,
+        velocity_fps=velocity,
+        status=status,
+        design_limit=result.design_limit,
+        line_limit=result.line_limit,
+        curve_flow_gpm=coarse,
+        pump_head_ft=np.interp(coarse, pump_flow, pump_head),
+        system_head_ft=coarse_system,
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def catalog_operating_points(catalog, line_type, points, static_head_ft=0.0,
+                             run_length_ft=REFERENCE_LENGTH_FT, fittings=()):
+    """Memoized :func:`operating_points`; ``points`` and ``fittings`` must be tuples."""
+    return operating_points(catalog, line_type, points, static_head_ft, run_length_ft, fittings)
@@ -0,0 +1,307 @@
+"""Rendering of the computed pipe table and velocity chart.
+
+The table is built from column arrays in a single linear pass. The
+finished fragments are memoized per (catalog, flow, line type) by
+:mod:`results`, so a repeated query never re-renders them.
+"""
+import numpy as np
+
+from sizing import STATUS_COLORS, STATUS_LABELS, catalog_breakpoints, status_codes, velocity
+
+# FILTER OUT 12 INCH PIPE - we don't need it in the table or chart!
+DISPLAY_EXCLUDED_NOMINAL_IN = (12.0,)
+
+# Alternating row backgrounds for odd and even rows (1-based)
+_STRIPES = ('#fbfcff', '#f8fbff')
+
+_TABLE_HEAD = """
+    <div style="display: flex; justify-content: center; margin: 20px 0;">
+        <table style="border-collapse: collapse; width: 90%; max-width: 700px; font-family: 'FrankTheArchitect', monospace; font-size: 18px; background-color: #fbfcff; border-radius: 12px; overflow: hidden; box-shadow: 0 6px 12px rgba(11, 130, 191, 0.15); border: 1px solid #d6e9ff;">
+            <thead>
+                <tr style="background: linear-gradient(135deg, #0b82bf 0%, #1e90ff 100%); color: #ffffff;">
+                    <th style="padding: 18px 20px; text-align: center; font-weight: bold; border: none; font-size: 16px;">Nominal Pipe Size (in)</th>
+                    <th style="padding: 18px 20px; text-align: center; font-weight: bold; border: none; font-size: 16px;">Velocity of water (ft/s)</th>@@EXTRA_HEADERS@@
+                </tr>
+            </thead>
+            <tbody>
+    """
+
+_TABLE_ROW = '<tr style="border-bottom: 1px solid #e6f3ff; background-color: {stripe};"><td style="padding: 14px 20px; text-align: center; font-weight: bold; border: none; color: #03263a;">{nominal}</td><td style="padding: 14px 20px; text-align: center; font-weight: bold; color: {color}; border: none;">{velocity}</td>{extra}</tr>'
+
+_EXTRA_HEADER = '\n                    <th style="padding: 18px 20px; text-align: center; font-weight: bold; border: none; font-size: 16px;">{}</th>'
+_EXTRA_CELL = '<td style="padding: 14px 20px; text-align: center; border: none; color: #03263a;">{:.2f}</td>'
+
+_TABLE_TAIL = """
+            </tbody>
+        </table>
+    </div>
+    """
+
+
+def pipe_table_html(nominal_in, velocity_fps, design_limit, line_limit, extra_columns=None):
+    """Render the pipe size / velocity table from column arrays.
+
+    Velocities are rounded to 2 decimals for display and colour coded
+    against the design and line limits. ``extra_columns`` optionally maps
+    further column titles to arrays shown after the velocity (2 decimals).
+    """
+    velocity_fps = np.round(np.asarray(velocity_fps, dtype=np.float64), 2)
+    colors = np.take(STATUS_COLORS, status_codes(velocity_fps, design_limit, line_limit))
+    nominal_in = np.asarray(nominal_in, dtype=np.float64)
+    extra_columns = extra_columns or {}
+    extra_cells = [
+        ''.join(_EXTRA_CELL.format(value) for value in values)
+        for values in zip(*(np.asarray(col, dtype=np.float64).tolist() for col in extra_columns.values()))
+    ] or [''] * len(nominal_in)
+    rows = [
+        _TABLE_ROW.format(stripe=_STRIPES[i % 2], nominal=nominal, color=color, velocity=vel, extra=extra)
+        for i, (nominal, vel, color, extra) in enumerate(zip(nominal_in.tolist(), velocity_fps.tolist(),
+                                                             colors.tolist(), extra_cells))
+    ]
+    head = _TABLE_HEAD.replace('@@EXTRA_HEADERS@@', ''.join(_EXTRA_HEADER.format(t) for t in extra_columns))
+    return ''.join([head, *rows, _TABLE_TAIL])
+
+
+def catalog_table_html(catalog, flow_gpm, line_type, losses=None):
+    """Table fragment for a catalog, flow and line type.
+
+    ``losses`` is a :class:`hydraulics.HeadLossResult` for the sized rows;
+    when given, head loss per 100 ft and over the run are added as columns.
+    """
+    breakpoints = catalog_breakpoints(catalog, line_type)
+    shown = ~np.isin(breakpoints.nominal_in, DISPLAY_EXCLUDED_NOMINAL_IN)
+    vel = velocity(flow_gpm, breakpoints.inner_in[shown], catalog.gal_to_ft3,
+                   catalog.sec_per_min, catalog.pi)
+    extra_columns = None
+    if losses is not None:
+        extra_columns = {
+            'Head loss (ft/100 ft)': losses.per_100ft[shown],
+            'Head loss over run (ft)': losses.total[shown],
+        }
+    return pipe_table_html(breakpoints.nominal_in[shown], vel,
+                           breakpoints.design_limit, breakpoints.line_limit, extra_columns)
+
+
+def velocity_chart(nominal_in, velocity_fps, design_limit, line_limit, height=360):
+    """Colour-coded Altair bar chart of velocity per nominal size, ordered by size."""
+    import altair as alt
+    import pandas as pd
+
+    nominal_in = np.asarray(nominal_in, dtype=np.float64)
+    velocity_fps = np.asarray(velocity_fps, dtype=np.float64)
+    order = np.argsort(nominal_in, kind='stable')
+    nominal_in, velocity_fps = nominal_in[order], velocity_fps[order]
+
+    chart_data = pd.DataFrame({
+        'Pipe Size': [str(n) for n in nominal_in.tolist()],
+        'Velocity': velocity_fps,
+        'Color': np.take(STATUS_COLORS, status_codes(velocity_fps, design_limit, line_limit)),
+        'Sort Order': nominal_in,
+    })
+    return alt.Chart(chart_data).mark_bar().encode(
+        x=alt.X('Pipe Size:N', title='Nominal Size (in)', sort=alt.EncodingSortField(field='Sort Order', op='mean')),
+        y=alt.Y('Velocity:Q', title='Velocity (ft/s)'),
+        color=alt.Color('Color:N', scale=None)
+    ).properties(height=height)
+
+
+def head_loss_chart(nominal_in, per_100ft, total, height=300):
+    """Altair bar chart of head loss over the run per nominal size, with the per-100 ft value as a tooltip."""
+    import altair as alt
+    import pandas as pd
+
+    nominal_in = np.asarray(nominal_in, dtype=np.float64)
+    order = np.argsort(nominal_in, kind='stable')
+    nominal_in = nominal_in[order]
+    chart_data = pd.DataFrame({
+        'Pipe Size': [str(n) for n in nominal_in.tolist()],
+        'Head Loss': np.round(np.asarray(total, dtype=np.float64)[order], 3),
+        'Per 100 ft': np.round(np.asarray(per_100ft, dtype=np.float64)[order], 3),
+        'Sort Order': nominal_in,
+    })
+    return alt.Chart(chart_data).mark_bar(color='#0b82bf').encode(
+        x=alt.X('Pipe Size:N', title='Nominal Size (in)', sort=alt.EncodingSortField(field='Sort Order', op='mean')),
+        y=alt.Y('Head Loss:Q', title='Head loss over run (ft)'),
+        tooltip=[alt.Tooltip('Pipe Size:N', title='Nominal (in)'),
+                 alt.Tooltip('Head Loss:Q', title='Head loss (ft)'),
+                 alt.Tooltip('Per 100 ft:Q', title='ft / 100 ft')],
+    ).properties(height=height)
+
+
+def operating_point_chart(points, recommended_size=None, height=380):
+    """Altair chart of the pump curve, each size's system curve and its operating point.
+
+    ``points`` is a :class:`pump.OperatingPoints`; the recommended size's
+    curve and point are drawn heavier.
+    """
+    import altair as alt
+    import pandas as pd
+
+    shown = ~np.isin(points.nominal_in, DISPLAY_EXCLUDED_NOMINAL_IN)
+    nominal_in = points.nominal_in[shown]
+    labels = [str(n) for n in nominal_in.tolist()]
+    n_flows = len(points.curve_flow_gpm)
+    curves = pd.DataFrame({
+        'Pipe Size': np.repeat(labels, n_flows),
+        'Flow': np.tile(points.curve_flow_gpm, len(labels)),
+        'Head': np.round(points.system_head_ft[:, shown].T.ravel(), 3),
+        'Sort Order': np.repeat(nominal_in, n_flows),
+        'Recommended': np.repeat(nominal_in == recommended_size, n_flows),
+    })
+    found = ~np.isnan(points.flow_gpm[shown])
+    operating = pd.DataFrame({
+        'Pipe Size': np.asarray(labels, dtype=object)[found],
+        'Flow': np.round(points.flow_gpm[shown][found], 2),
+        'Head': np.round(points.head_ft[shown][found], 2),
+        'Velocity': np.round(points.velocity_fps[shown][found], 2),
+        'Color': np.take(STATUS_COLORS, points.status[shown][found]),
+        'Recommended': nominal_in[found] == recommended_size,
+    })
+    pump = pd.DataFrame({'Flow': points.curve_flow_gpm, 'Head': np.round(points.pump_head_ft, 3)})
+
+    sort = alt.EncodingSortField(field='Sort Order', op='mean')
+    x = alt.X('Flow:Q', title='Flow (gpm)')
+    # System curves of small pipes shoot far past the pump; keep the axis on the pump's range
+    top = float(np.max(points.pump_head_ft)) * 1.15 or 1.0
+    y = alt.Y('Head:Q', title='Head (ft)', scale=alt.Scale(domain=[0, top]))
+    system_lines = alt.Chart(curves).mark_line(clip=True).encode(
+        x=x, y=y,
+        color=alt.Color('Pipe Size:N', title='Nominal (in)', sort=sort),
+        strokeWidth=alt.condition('datum.Recommended', alt.value(3), alt.value(1.2)),
+    )
+    pump_line = alt.Chart(pump).mark_line(color='#03263a', strokeDash=[6, 3], strokeWidth=2.5, clip=True).encode(x=x, y=y)
+    dots = alt.Chart(operating).mark_point(filled=True, opacity=1, clip=True).encode(
+        x=x, y=y,
+        color=alt.Color('Color:N', scale=None),
+        size=alt.condition('datum.Recommended', alt.value(220), alt.value(80)),
+        tooltip=[alt.Tooltip('Pipe Size:N', title='Nominal (in)'),
+                 alt.Tooltip('Flow:Q', title='Flow (gpm)'),
+                 alt.Tooltip('Head:Q', title='Head (ft)'),
+                 alt.Tooltip('Velocity:Q', title='Velocity (ft/s)')],
+    )
+    return alt.layer(system_lines, pump_line, dots).properties(height=height)
+
+
+def _sweep_frame(sweep, values):
+    """Long-form (size, flow, value) rows of a :class:`sweep.FlowSweep`, without excluded sizes."""
+    import pandas as pd
+
+    shown = ~np.isin(sweep.nominal_in, DISPLAY_EXCLUDED_NOMINAL_IN)
+    nominal_in = sweep.nominal_in[shown]
+    n_points = sweep.flow_gpm.shape[0]
+    return pd.DataFrame({
+        'Pipe Size': np.repeat([str(n) for n in nominal_in.tolist()], n_points),
+        'Flow': np.round(sweep.flow_gpm[:, shown].T.ravel(), 3),
+        'Value': np.round(values[:, shown].T.ravel(), 4),
+        'Sort Order': np.repeat(nominal_in, n_points),
+    })
+
+
+def _flow_rule(flow_gpm):
+    """Dashed vertical marker at the flow being sized."""
+    import altair as alt
+    import pandas as pd
+
+    return alt.Chart(pd.DataFrame({'Flow': [float(flow_gpm)]})).mark_rule(color='#03263a', strokeDash=[4, 4]).encode(
+        x='Flow:Q', tooltip=[alt.Tooltip('Flow:Q', title='Design flow (gpm)')])
+
+
+def _band_chart(edges, colors, labels):
+    """Shaded horizontal bands between consecutive ``edges``."""
+    import altair as alt
+    import pandas as pd
+
+    bands = pd.DataFrame({'From': edges[:-1], 'To': edges[1:], 'Color': colors, 'Band': labels})
+    return alt.Chart(bands).mark_rect(opacity=0.12).encode(
+        y='From:Q', y2='To:Q', color=alt.Color('Color:N', scale=None),
+        tooltip=[alt.Tooltip('Band:N', title='Band')])
+
+
+def velocity_sweep_chart(sweep, flow_gpm=None, height=380):
+    """Velocity against flow for every size over the design/line limit bands, marking ``flow_gpm``."""
+    import altair as alt
+
+    # Small pipes run far past the limits; keep the axis on the band that matters
+    top = 2.0 * sweep.line_limit
+    bands = _band_chart([0.0, sweep.design_limit, sweep.line_limit, top], list(STATUS_COLORS),
+                        [f'{STATUS_LABELS[0]} (≤ {sweep.design_limit:g} ft/s)',
+                         f'{STATUS_LABELS[1]} (≤ {sweep.line_limit:g} ft/s)',
+                         f'{STATUS_LABELS[2]} (> {sweep.line_limit:g} ft/s)'])
+    lines = alt.Chart(_sweep_frame(sweep, sweep.velocity_fps)).mark_line(clip=True).encode(
+        x=alt.X('Flow:Q', title='Flow (gpm)'),
+        y=alt.Y('Value:Q', title='Velocity (ft/s)', scale=alt.Scale(domain=[0, top])),
+        color=alt.Color('Pipe Size:N', title='Nominal (in)', sort=alt.EncodingSortField(field='Sort Order', op='mean')),
+        tooltip=[alt.Tooltip('Pipe Size:N', title='Nominal (in)'), alt.Tooltip('Flow:Q', title='Flow (gpm)'),
+                 alt.Tooltip('Value:Q', title='Velocity (ft/s)', format='.2f')],
+    )
+    layers = [bands, lines] + ([_flow_rule(flow_gpm)] if flow_gpm is not None else [])
+    return alt.layer(*layers).properties(height=height)
+
+
+def reynolds_sweep_chart(sweep, flow_gpm=None, height=320):
+    """Reynolds number against flow (log scale) over the laminar/transitional/turbulent bands."""
+    import altair as alt
+
+    from hydraulics import LAMINAR_RE, TURBULENT_RE
+
+    frame = _sweep_frame(sweep, sweep.reynolds)
+    frame = frame[frame['Value'] > 0]
+    top = float(frame['Value'].max()) * 1.5 if len(frame) else 10 * TURBULENT_RE
+    bottom = min(float(frame['Value'].min()) if len(frame) else LAMINAR_RE, LAMINAR_RE / 2)
+    bands = _band_chart([bottom, LAMINAR_RE, TURBULENT_RE, max(top, 2 * TURBULENT_RE)],
+                        ['#0b82bf', '#ff7f0e', '#7f7f7f'],
+                        [f'Laminar (Re < {LAMINAR_RE:g})', 'Transitional', f'Turbulent (Re ≥ {TURBULENT_RE:g})'])
+    lines = alt.Chart(frame).mark_line(clip=True).encode(
+        x=alt.X('Flow:Q', title='Flow (gpm)'),
+        y=alt.Y('Value:Q', title='Reynolds number', scale=alt.Scale(type='log')),
+        color=alt.Color('Pipe Size:N', title='Nominal (in)', sort=alt.EncodingSortField(field='Sort Order', op='mean')),
+        tooltip=[alt.Tooltip('Pipe Size:N', title='Nominal (in)'), alt.Tooltip('Flow:Q', title='Flow (gpm)'),
+                 alt.Tooltip('Value:Q', title='Reynolds', format=',.0f')],
+    )
+    layers = [bands, lines] + ([_flow_rule(flow_gpm)] if flow_gpm is not None else [])
+    return alt.layer(*layers).properties(height=height)
+
+
+def chart_frames(nominal_in, result, losses=None):
+    """Source frame of the velocity chart and the cleaned, sorted rows it plots.
+
+    The second frame is ``None`` if the data could not be prepared.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame({'Nominal (in)': nominal_in,
+                       'Inner D (in)': result.inner_in,
+                       'Area (ft^2)': result.area,
+                       'Velocity (ft/s)': result.velocity,
+                       'Status': [STATUS_LABELS[code] for code in result.status.tolist()],
+                       'Reynolds': result.reynolds})
+    if losses is not None:
+        df['Friction factor'] = losses.friction_factor
+        df['Head loss (ft/100 ft)'] = losses.per_100ft
+        df['Head loss (ft)'] = losses.total
+    if df.empty:
+        return df, df
+    try:
+        # Ensure numeric velocity and nominal ordering
+        df['Velocity (ft/s)'] = pd.to_numeric(df['Velocity (ft/s)'], errors='coerce')
+        # sanitize infinite values (avoid chained-assignment inplace warning)
+        df['Velocity (ft/s)'] = df['Velocity (ft/s)'].replace([float('inf'), float('-inf')], pd.NA)
+
+        # keep nominal as string for category axis but sort by numeric value properly
+        try:
+            df['_nominal_sort'] = pd.to_numeric(df['Nominal (in)'], errors='coerce')
+            # Sort dataframe by nominal size for proper chart ordering
+            df = df.sort_values('_nominal_sort').reset_index(drop=True)
+        except Exception:
+            df['_nominal_sort'] = range(len(df))
+        df['_nominal_label'] = df['Nominal (in)'].astype(str)
+
+        # drop rows without numeric velocities before charting
+        chart_df = df.dropna(subset=['Velocity (ft/s)']).copy()
+        # FILTER OUT 12 INCH PIPE FROM CHART TOO!
+        chart_df = chart_df[~chart_df['Nominal (in)'].isin(DISPLAY_EXCLUDED_NOMINAL_IN)]
+        # Sort chart data by nominal size
+        chart_df = chart_df.sort_values('_nominal_sort').reset_index(drop=True)
+    except Exception:
+        return df, None
+    return df, chart_df
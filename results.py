@@ -0,0 +1,179 @@
+"""Process-wide cache of computed single-line views.
+
+Users keep entering the same handful of flows, so everything the
+single-line view derives from (catalog, flow, line type, run) -- the
+sizing arrays, friction losses, the recommendation, the table fragment
+and the chart frames -- is computed once and shared by every session.
+Entries are keyed on the catalog's content hash, evicted least recently used first, and bounded
+by an approximate memory cap (``PIPE_SIZING_RESULT_CACHE_MB``, default
+64 MB).
+"""
+import collections
+import os
+import sys
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from hydraulics import REFERENCE_LENGTH_FT, HeadLossResult, friction_losses
+from render import catalog_table_html, chart_frames, head_loss_chart, velocity_chart
+from sizing import MIN_NOMINAL_IN, SizingResult, catalog_breakpoints, size_catalog
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get('PIPE_SIZING_RESULT_CACHE_MB', '64')) * 1024 * 1024)
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize', 'nbytes'])
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by the total estimated size of its values.
+
+    Values are computed outside the lock, so a slow miss doesn't block
+    hits from other sessions; two sessions missing on the same key at
+    once both compute it and the second result wins.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data = collections.OrderedDict()  # key -> (value, nbytes)
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_create(self, key, factory, sizeof):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+        value = factory()
+        nbytes = sizeof(value)
+        if nbytes > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            self._data[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._nbytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+
+    def cache_info(self):
+        """Same fields as ``functools.lru_cache``'s, plus the estimated ``nbytes`` held."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self.max_bytes, len(self._data), self._nbytes)
+
+
+@dataclass(frozen=True, eq=False)
+class SizedView:
+    """Everything the single-line view shows for one (catalog, flow, line type, run).
+
+    Shared between sessions: treat the arrays as read-only. Only numeric
+    results and the finished fragments are kept; the DataFrames behind
+    the charts are rebuilt by :meth:`frames` when a fallback needs them.
+    """
+    nominal_in: np.ndarray
+    result: SizingResult
+    losses: HeadLossResult
+    recommended_idx: int  # into the sized rows; -1 when no size is within the line limit
+    recommended_size: float
+    recommended_velocity: float
+    table_html: str
+    chart_rows: int  # cleaned rows the charts plot; -1 if they could not be prepared
+    chart: object  # Altair chart, or None if it could not be built
+    head_loss_chart: object  # Altair chart, or None if it could not be built
+
+    def frames(self):
+        """Frame of every sized row and the cleaned rows to plot (see :func:`render.chart_frames`)."""
+        return chart_frames(self.nominal_in, self.result, self.losses)
+
+
+def build_view(catalog, flow_gpm, line_type, run_length_ft=REFERENCE_LENGTH_FT, fittings=None):
+    """Compute a :class:`SizedView` (uncached).
+
+    ``fittings`` maps :data:`hydraulics.FITTING_LD` names to counts on the run.
+    """
+    # FORCE SKIP 1 INCH PIPE - only process if >= 1.5 inches
+    sized = catalog.nominal_in >= MIN_NOMINAL_IN
+    nominal_in = catalog.nominal_in[sized]
+    result = size_catalog(catalog, flow_gpm, line_type, sized)
+    losses = friction_losses(result, run_length_ft, fittings, roughness_ft=catalog.roughness_ft)
+    # The first (smallest) size within the line limit, from the precomputed flow breakpoints
+    breakpoints = catalog_breakpoints(catalog, line_type)
+    idx = int(breakpoints.recommend(flow_gpm))
+    _, chart_frame = chart_frames(nominal_in, result, losses)
+    chart = loss_chart = None
+    if chart_frame is not None and not chart_frame.empty:
+        try:
+            chart = velocity_chart(chart_frame['Nominal (in)'], chart_frame['Velocity (ft/s)'],
+                                   result.design_limit, result.line_limit)
+        except Exception:
+            chart = None
+        try:
+            loss_chart = head_loss_chart(chart_frame['Nominal (in)'], chart_frame['Head loss (ft/100 ft)'],
+                                         chart_frame['Head loss (ft)'])
+        except Exception:
+            loss_chart = None
+    return SizedView(
+        nominal_in=nominal_in,
+        result=result,
+        losses=losses,
+        recommended_idx=idx,
+        recommended_size=float(breakpoints.nominal_in[idx]) if idx >= 0 else None,
+        recommended_velocity=float(result.velocity[idx]) if idx >= 0 else None,
+        table_html=catalog_table_html(catalog, flow_gpm, line_type, losses),
+        chart_rows=len(chart_frame) if chart_frame is not None else -1,
+        chart=chart,
+        head_loss_chart=loss_chart,
+    )
+
+
+# Measured with tracemalloc: an Altair chart's schema objects take ~3-9 KB beyond its
+# data, and the view's dataclass, small DataFrame and dict overhead a few KB more
+_CHART_OVERHEAD_BYTES = 8192
+_VIEW_OVERHEAD_BYTES = 6144
+
+
+def _frame_nbytes(frame):
+    return 0 if frame is None else int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def view_nbytes(view):
+    """Approximate memory held by a :class:`SizedView`."""
+    arrays = (view.nominal_in, view.result.inner_in, view.result.area, view.result.velocity,
+              view.result.reynolds, view.result.status, view.losses.friction_factor,
+              view.losses.per_100ft, view.losses.total, view.losses.equivalent_length_ft)
+    nbytes = sum(a.nbytes for a in arrays) + sys.getsizeof(view.table_html)
+    for chart in (view.chart, view.head_loss_chart):
+        if chart is not None:
+            nbytes += _frame_nbytes(chart.data) + _CHART_OVERHEAD_BYTES
+    return nbytes + _VIEW_OVERHEAD_BYTES
+
+
+_views = LRUCache()
+
+
+def sized_view(catalog, flow_gpm, line_type, run_length_ft=REFERENCE_LENGTH_FT, fittings=None):
+    """Shared :class:`SizedView` for (catalog version, flow, line type, run length, fittings)."""
+    flow_gpm = float(flow_gpm)
+    run_length_ft = float(run_length_ft)
+    fittings = tuple(sorted((name, count) for name, count in dict(fittings or {}).items() if count))
+    key = (catalog.version, flow_gpm, line_type, run_length_ft, fittings)
+    return _views.get_or_create(key, lambda: build_view(catalog, flow_gpm, line_type, run_length_ft, fittings),
+                                view_nbytes)
+
+
+def view_cache():
+    """The process-wide view cache (for stats and tests)."""
+    return _views
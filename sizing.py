@@ -0,0 +1,198 @@
+"""Vectorized pipe sizing engine.
+
+Pure NumPy functions with no Streamlit dependency, so they can be used
+from scripts, notebooks, the batch mode and the API. Every function
+broadcasts: pass an array of flows and an array of inner diameters and
+the results come back with shape ``flows.shape + (n_sizes,)``.
+"""
+import functools
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# Defaults matching the constants in pipe_sizing.xlsx
+GAL_TO_FT3 = 0.133681
+SEC_PER_MIN = 60.0
+NU_WATER = 1.1e-05
+
+LINE_TYPES = ('Suction', 'Return')
+
+# (design limit, line limit) in ft/s per line type
+LINE_LIMITS = {
+    'Suction': (4.5, 6.0),
+    'Return': (6.0, 8.0),
+}
+
+# Status codes, ordered so that a larger code is a worse status
+ACCEPTABLE = 0
+ABOVE_DESIGN_LIMIT = 1
+UNACCEPTABLE = 2
+
+STATUS_LABELS = ('Acceptable', 'Above design limit', 'Unacceptable')
+STATUS_COLORS = ('#2ca02c', '#ff7f0e', '#d62728')
+
+# Smallest nominal size (in) the app will recommend; 1" pipe is never sized
+MIN_NOMINAL_IN = 1.5
+
+
+def normalize_line_type(value):
+    """Map free-form line type text to ``'Suction'``/``'Return'``, or ``None`` if unrecognized."""
+    text = str(value).strip().lower()
+    if text.startswith('suction'):
+        return 'Suction'
+    # Return was previously called Discharge
+    if text.startswith(('return', 'discharge')):
+        return 'Return'
+    return None
+
+
+def line_limits(line_type):
+    """Return ``(design_limit, line_limit)`` in ft/s for a line type.
+
+    Anything that is not Suction is treated as Return (previously Discharge).
+    """
+    if str(line_type).lower().startswith('suction'):
+        return LINE_LIMITS['Suction']
+    return LINE_LIMITS['Return']
+
+
+def pipe_area(inner_in, pi=math.pi):
+    """Cross-sectional area in ft² for inner diameters in inches."""
+    inner_in = np.asarray(inner_in, dtype=np.float64)
+    return (pi * (inner_in / 12) ** 2) / 4
+
+
+def velocity(flow_gpm, inner_in, gal_to_ft3=GAL_TO_FT3, sec_per_min=SEC_PER_MIN, pi=math.pi):
+    """Velocity in ft/s for every flow (gpm) × inner diameter (in) pair."""
+    flow_gpm = np.asarray(flow_gpm, dtype=np.float64)
+    area = pipe_area(inner_in, pi)
+    return (flow_gpm[..., None] * gal_to_ft3 / sec_per_min) / area
+
+
+def reynolds(velocity_fps, inner_in, nu=NU_WATER):
+    """Reynolds number ``V * D(ft) / nu`` for velocities laid out as from :func:`velocity`."""
+    inner_in = np.asarray(inner_in, dtype=np.float64)
+    return velocity_fps * (inner_in / 12) / nu
+
+
+def status_codes(velocity_fps, design_limit, line_limit):
+    """Status code matrix: ACCEPTABLE, ABOVE_DESIGN_LIMIT or UNACCEPTABLE."""
+    velocity_fps = np.asarray(velocity_fps)
+    return (velocity_fps > design_limit).astype(np.int8) + (velocity_fps > line_limit)
+
+
+@dataclass(frozen=True)
+class SizingResult:
+    """Sizing arrays for a set of flows against a set of pipe sizes.
+
+    ``area`` has shape ``(n_sizes,)``; ``velocity``, ``reynolds`` and
+    ``status`` have shape ``flows.shape + (n_sizes,)``.
+    """
+    inner_in: np.ndarray
+    area: np.ndarray
+    velocity: np.ndarray
+    reynolds: np.ndarray
+    status: np.ndarray
+    design_limit: float
+    line_limit: float
+
+
+def size_lines(flow_gpm, inner_in, line_type='Suction', nu=NU_WATER,
+               gal_to_ft3=GAL_TO_FT3, sec_per_min=SEC_PER_MIN, pi=math.pi):
+    """Compute velocity, Reynolds number and status for flows × sizes in one pass."""
+    inner_in = np.asarray(inner_in, dtype=np.float64)
+    design_limit, line_limit = line_limits(line_type)
+    area = pipe_area(inner_in, pi)
+    vel = velocity(flow_gpm, inner_in, gal_to_ft3, sec_per_min, pi)
+    return SizingResult(
+        inner_in=inner_in,
+        area=area,
+        velocity=vel,
+        reynolds=reynolds(vel, inner_in, nu),
+        status=status_codes(vel, design_limit, line_limit),
+        design_limit=design_limit,
+        line_limit=line_limit,
+    )
+
+
+def size_catalog(catalog, flow_gpm, line_type='Suction', sizes=None):
+    """Run :func:`size_lines` against a :class:`catalog.PipeCatalog`.
+
+    ``sizes`` optionally selects catalog rows (boolean mask or indices).
+    """
+    inner_in = catalog.inner_in if sizes is None else catalog.inner_in[sizes]
+    return size_lines(flow_gpm, inner_in, line_type, nu=catalog.nu,
+                      gal_to_ft3=catalog.gal_to_ft3, sec_per_min=catalog.sec_per_min,
+                      pi=catalog.pi)
+
+
+@dataclass(frozen=True)
+class FlowBreakpoints:
+    """Maximum flow each pipe size carries at the design and line limits.
+
+    Velocity falls as the pipe gets bigger, so the smallest size within the
+    line limit is a sorted search over ``line_gpm`` instead of a velocity
+    matrix. ``line_gpm`` is a running maximum, which keeps the search exact
+    even if a catalog lists a smaller bore after a larger one.
+    """
+    nominal_in: np.ndarray
+    inner_in: np.ndarray
+    area: np.ndarray
+    design_gpm: np.ndarray
+    line_gpm: np.ndarray
+    design_limit: float
+    line_limit: float
+    gal_to_ft3: float
+    sec_per_min: float
+
+    def recommend(self, flow_gpm):
+        """Index of the recommended size for each flow, or ``-1`` if none qualifies."""
+        idx = np.searchsorted(self.line_gpm, flow_gpm, side='left')
+        return np.where(idx < len(self.line_gpm), idx, -1)
+
+    def lookup(self, flow_gpm):
+        """Return ``(index, velocity, status)`` of the recommended size for each flow.
+
+        Flows with no qualifying size get index ``-1``, NaN velocity and
+        status ``UNACCEPTABLE``.
+        """
+        flow_gpm = np.asarray(flow_gpm, dtype=np.float64)
+        idx = self.recommend(flow_gpm)
+        found = idx >= 0
+        safe = np.where(found, idx, 0)
+        vel = np.where(found, (flow_gpm * self.gal_to_ft3 / self.sec_per_min) / self.area[safe], np.nan)
+        status = np.where(found, status_codes(vel, self.design_limit, self.line_limit), UNACCEPTABLE)
+        return idx, vel, status.astype(np.int8)
+
+
+def flow_breakpoints(nominal_in, inner_in, line_type='Suction',
+                     gal_to_ft3=GAL_TO_FT3, sec_per_min=SEC_PER_MIN, pi=math.pi):
+    """Build :class:`FlowBreakpoints` for a set of sizes and a line type."""
+    nominal_in = np.asarray(nominal_in, dtype=np.float64)
+    inner_in = np.asarray(inner_in, dtype=np.float64)
+    design_limit, line_limit = line_limits(line_type)
+    area = pipe_area(inner_in, pi)
+    # Flow (gpm) at which a pipe reaches velocity V: V * area / (gal_to_ft3 / sec_per_min)
+    gpm_to_cfs = gal_to_ft3 / sec_per_min
+    arrays = {
+        'nominal_in': nominal_in,
+        'inner_in': inner_in,
+        'area': area,
+        'design_gpm': design_limit * area / gpm_to_cfs,
+        'line_gpm': np.maximum.accumulate(line_limit * area / gpm_to_cfs),
+    }
+    for arr in arrays.values():
+        arr.flags.writeable = False
+    return FlowBreakpoints(design_limit=design_limit, line_limit=line_limit,
+                           gal_to_ft3=gal_to_ft3, sec_per_min=sec_per_min, **arrays)
+
+
+@functools.lru_cache(maxsize=32)
+def catalog_breakpoints(catalog, line_type='Suction', min_nominal=MIN_NOMINAL_IN):
+    """Breakpoints for a catalog's sizes >= ``min_nominal``, computed once per catalog and line type."""
+    sized = catalog.nominal_in >= min_nominal
+    return flow_breakpoints(catalog.nominal_in[sized], catalog.inner_in[sized],
+                            line_type,
+                            gal_to_ft3=catalog.gal_to_ft3, sec_per_min=catalog.sec_per_min,
+                            pi=catalog.pi)
@@ -0,0 +1,159 @@
+"""Concurrent-session soak test for the Streamlit app.
+
+Opens N app sessions in one process, the way the server holds them,
+drives each through a series of reruns with changing inputs from a pool
+of threads, and reports resident memory (RSS) growth per session and
+rerun latency percentiles::
+
+    python soak.py --sessions 20 --concurrency 4 --reruns 30
+    python soak.py --sessions 50 --json
+
+Sessions are Streamlit ``AppTest`` instances, so RSS also includes each
+test client's copy of the rendered page; treat per-session figures as an
+upper bound on the server's own share.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_PATH = Path(__file__).parent / 'app.py'
+
+MB = 1024 * 1024
+
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    if not len(ms):
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    return {'p50_ms': round(float(np.percentile(ms, 50)), 2), 'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(ms, 99)), 2), 'max_ms': round(float(ms.max()), 2)}
+
+
+def _open_session():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(APP_PATH), default_timeout=120)
+    start = time.perf_counter()
+    at.run()
+    return at, time.perf_counter() - start
+
+
+def _change_inputs(at, rng):
+    """Change what a designer would: mostly the flow, sometimes line type or pipe series."""
+    roll = rng.random()
+    if roll < 0.1:
+        material = at.selectbox(key='pipe-material')
+        material.set_value(rng.choice(material.options))
+    elif roll < 0.25:
+        line_type = next(s for s in at.selectbox if s.label == 'Line Type')
+        line_type.set_value(rng.choice(line_type.options))
+    else:
+        at.number_input[0].set_value(float(rng.randrange(5, 600)))
+
+
+def _drive(sessions, reruns, seed, latencies, errors):
+    rng = random.Random(seed)
+    for _ in range(reruns):
+        for at in sessions:
+            _change_inputs(at, rng)
+            start = time.perf_counter()
+            at.run()
+            latencies.append(time.perf_counter() - start)
+            if at.exception:
+                errors.append(at.exception[0].value)
+
+
+def run(sessions=10, concurrency=4, reruns=20, seed=0):
+    """Run the soak test and return a dict of summary statistics."""
+    # Import the app's modules and warm the shared caches once, outside the measurement
+    warm, _ = _open_session()
+    del warm
+    gc.collect()
+    rss_start = rss_bytes()
+
+    opened, first = [], []
+    for _ in range(sessions):
+        at, seconds = _open_session()
+        opened.append(at)
+        first.append(seconds)
+    gc.collect()
+    rss_opened = rss_bytes()
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_drive, args=(opened[i::concurrency], reruns, seed + i, latencies, errors))
+               for i in range(min(concurrency, sessions))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    rss_end = rss_bytes()
+
+    opened.clear()
+    gc.collect()
+    rss_closed = rss_bytes()
+    # Growth during reruns is mostly the shared view cache filling up to its cap
+    from results import view_cache
+
+    views = view_cache().cache_info()
+    return {
+        'sessions': sessions,
+        'concurrency': concurrency,
+        'reruns_per_session': reruns,
+        'errors': len(errors),
+        'rss_start_mb': round(rss_start / MB, 1),
+        'rss_sessions_open_mb': round(rss_opened / MB, 1),
+        'rss_end_mb': round(rss_end / MB, 1),
+        'rss_sessions_closed_mb': round(rss_closed / MB, 1),
+        'per_session_mb': round((rss_opened - rss_start) / MB / sessions, 2) if sessions else None,
+        'rerun_growth_mb': round((rss_end - rss_opened) / MB, 1),
+        'view_cache_entries': views.currsize,
+        'view_cache_mb': round(views.nbytes / MB, 2),
+        'first_run': _percentiles(first),
+        'rerun': _percentiles(latencies),
+        'reruns_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Soak test the app with concurrent sessions.')
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4, help='threads driving the sessions')
+    parser.add_argument('--reruns', type=int, default=20, help='input changes per session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    stats = run(args.sessions, args.concurrency, args.reruns, args.seed)
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        for key, value in stats.items():
+            print(f'{key:>22}: {value}')
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Standard pipe dimensions by material and schedule.
+
+Inner diameters are derived from the published outside diameters and
+wall thicknesses (schedule pipe), outside diameter and dimension ratio
+(SDR pipe, minimum wall), or listed directly (copper tube). The
+workbook's own table overrides the series it describes, see
+:func:`catalog.build_library`.
+"""
+
+# Absolute roughness by material, ft: smooth plastic and drawn copper tube
+# are both about 0.0015 mm; HDPE is commonly designed at 0.007 mm
+ROUGHNESS_FT = {'PVC': 5e-6, 'Copper': 5e-6, 'HDPE': 2.3e-5}
+
+# Iron pipe size (IPS) outside diameters shared by PVC and IPS HDPE, in
+IPS_OD_IN = {
+    0.5: 0.840, 0.75: 1.050, 1: 1.315, 1.25: 1.660, 1.5: 1.900, 2: 2.375, 2.5: 2.875, 3: 3.500,
+    4: 4.500, 5: 5.563, 6: 6.625, 8: 8.625, 10: 10.750, 12: 12.750, 14: 14.000, 16: 16.000,
+    18: 18.000, 20: 20.000, 24: 24.000,
+}
+
+# Minimum wall thickness per nominal size, in (ASTM D1785)
+_SCHEDULE_WALL_IN = {
+    'Schedule 40': {
+        0.5: 0.109, 0.75: 0.113, 1: 0.133, 1.25: 0.140, 1.5: 0.145, 2: 0.154, 2.5: 0.203, 3: 0.216,
+        4: 0.237, 5: 0.258, 6: 0.280, 8: 0.322, 10: 0.365, 12: 0.406, 14: 0.438, 16: 0.500,
+        18: 0.562, 20: 0.594, 24: 0.688,
+    },
+    'Schedule 80': {
+        0.5: 0.147, 0.75: 0.154, 1: 0.179, 1.25: 0.191, 1.5: 0.200, 2: 0.218, 2.5: 0.276, 3: 0.300,
+        4: 0.337, 5: 0.375, 6: 0.432, 8: 0.500, 10: 0.593, 12: 0.687, 14: 0.750, 16: 0.843,
+        18: 0.937, 20: 1.031, 24: 1.218,
+    },
+}
+
+# Copper tube inner diameters per nominal size, in (ASTM B88)
+_COPPER_ID_IN = {
+    'Type K': {
+        0.25: 0.305, 0.375: 0.402, 0.5: 0.527, 0.625: 0.652, 0.75: 0.745, 1: 0.995, 1.25: 1.245,
+        1.5: 1.481, 2: 1.959, 2.5: 2.435, 3: 2.907, 3.5: 3.385, 4: 3.857, 5: 4.805, 6: 5.741,
+        8: 7.583, 10: 9.449, 12: 11.315,
+    },
+    'Type L': {
+        0.25: 0.315, 0.375: 0.430, 0.5: 0.545, 0.625: 0.666, 0.75: 0.785, 1: 1.025, 1.25: 1.265,
+        1.5: 1.505, 2: 1.985, 2.5: 2.465, 3: 2.945, 3.5: 3.425, 4: 3.905, 5: 4.875, 6: 5.845,
+        8: 7.725, 10: 9.625, 12: 11.565,
+    },
+    'Type M': {
+        0.375: 0.450, 0.5: 0.569, 0.75: 0.811, 1: 1.055, 1.25: 1.291, 1.5: 1.527, 2: 2.009,
+        2.5: 2.495, 3: 2.981, 3.5: 3.459, 4: 3.935, 5: 4.907, 6: 5.881, 8: 7.785, 10: 9.701,
+        12: 11.617,
+    },
+}
+
+# Smallest nominal size made in each SDR series
+_SDR_MIN_NOMINAL_IN = {('PVC', 21): 0.75, ('PVC', 26): 1, ('HDPE', 11): 0.5, ('HDPE', 17): 1}
+
+
+def _schedule(wall):
+    return {n: round(IPS_OD_IN[n] - 2 * t, 3) for n, t in wall.items()}
+
+
+def _sdr(material, ratio):
+    return {n: round(od * (1 - 2 / ratio), 3) for n, od in IPS_OD_IN.items()
+            if n >= _SDR_MIN_NOMINAL_IN[(material, ratio)]}
+
+
+def standard_series():
+    """Every built-in series as ``{(material, schedule): {nominal in: inner in}}``."""
+    series = {('PVC', name): _schedule(wall) for name, wall in _SCHEDULE_WALL_IN.items()}
+    for material, ratio in _SDR_MIN_NOMINAL_IN:
+        series[(material, f'SDR {ratio}')] = _sdr(material, ratio)
+    for name, inner in _COPPER_ID_IN.items():
+        series[('Copper', name)] = dict(inner)
+    return series
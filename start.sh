@@ -6,5 +6,14 @@ echo "Starting Pipe Sizing App on Render..."
 # Install dependencies if needed
 pip install -r requirements.txt
 
+# Precompile the pipe catalog and prepare the font and resized logo for static serving
+python catalog.py
+python assets.py
+
+# Optionally serve the headless JSON sizing API alongside the UI
+if [ -n "$SIZING_API_PORT" ]; then
+    python api.py --host 0.0.0.0 --port "$SIZING_API_PORT" &
+fi
+
 # Start Streamlit app
 streamlit run app.py --server.port=${PORT:-10000} --server.address=0.0.0.0 --server.headless=true --server.fileWatcherType=none
\ No newline at end of file
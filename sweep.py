@@ -0,0 +1,82 @@
+"""Velocity and Reynolds number against flow for every catalog size.
+
+The sweep is sized by the vectorized engine on a fine flow grid, then
+reduced on the server with min/max bucketing before it reaches a chart:
+each size keeps the lowest and highest point of every bucket, so peaks
+and limit crossings survive while the browser gets a few hundred points
+per line instead of the full grid.
+"""
+import functools
+from dataclasses import dataclass
+
+import numpy as np
+
+from sizing import MIN_NOMINAL_IN, size_catalog
+
+# Flow grid the sweep is computed on
+SWEEP_POINTS = 10_001
+
+# Points per size handed to the chart after downsampling
+MAX_CHART_POINTS = 200
+
+
+def downsample_indices(values, max_points=MAX_CHART_POINTS):
+    """Row indices keeping the min and max of each bucket, per column of ``values`` (n, k).
+
+    Returns an ``(m, k)`` array of increasing indices with ``m <= max_points + 2``;
+    the first and last rows are always kept.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n, k = values.shape
+    if n <= max_points:
+        return np.broadcast_to(np.arange(n)[:, None], (n, k))
+    buckets = max(max_points // 2, 1)
+    width = -(-n // buckets)
+    # Pad with the last row so every bucket has the same width
+    padded = np.concatenate([values, np.repeat(values[-1:], buckets * width - n, axis=0)])
+    grouped = padded.reshape(buckets, width, k)
+    offsets = (np.arange(buckets) * width)[:, None]
+    low, high = grouped.argmin(axis=1), grouped.argmax(axis=1)
+    lo = np.minimum(low, high) + offsets
+    hi = np.maximum(low, high) + offsets
+    kept = np.stack([lo, hi], axis=1).reshape(2 * buckets, k)
+    first = np.zeros((1, k), dtype=kept.dtype)
+    last = np.full((1, k), n - 1, dtype=kept.dtype)
+    return np.minimum(np.concatenate([first, kept, last]), n - 1)
+
+
+@dataclass(frozen=True, eq=False)
+class FlowSweep:
+    """Downsampled sweep; ``flow_gpm``, ``velocity_fps`` and ``reynolds`` are ``(points, n_sizes)``."""
+    nominal_in: np.ndarray
+    flow_gpm: np.ndarray
+    velocity_fps: np.ndarray
+    reynolds: np.ndarray
+    design_limit: float
+    line_limit: float
+    points_computed: int
+
+
+def flow_sweep(catalog, line_type, max_flow_gpm, sweep_points=SWEEP_POINTS, max_points=MAX_CHART_POINTS):
+    """Velocity and Reynolds number from 0 to ``max_flow_gpm`` for every sized catalog pipe."""
+    sized = catalog.nominal_in >= MIN_NOMINAL_IN
+    grid = np.linspace(0.0, float(max_flow_gpm), sweep_points)
+    result = size_catalog(catalog, grid, line_type, sized)
+    # Reynolds is velocity times a per-size constant, so the same rows serve both
+    rows = downsample_indices(result.velocity, max_points)
+    cols = np.arange(rows.shape[1])
+    return FlowSweep(
+        nominal_in=catalog.nominal_in[sized],
+        flow_gpm=grid[rows],
+        velocity_fps=result.velocity[rows, cols],
+        reynolds=result.reynolds[rows, cols],
+        design_limit=result.design_limit,
+        line_limit=result.line_limit,
+        points_computed=result.velocity.size,
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def catalog_flow_sweep(catalog, line_type, max_flow_gpm):
+    """Memoized :func:`flow_sweep` with the default grid and chart resolution."""
+    return flow_sweep(catalog, line_type, max_flow_gpm)
@@ -0,0 +1,89 @@
+"""Behaviour checks for the worksheet formula evaluator in :mod:`formulas`."""
+import pytest
+
+from formulas import CellError, FormulaError, FormulaGraph
+
+DIV0 = CellError('#DIV/0!')
+VALUE = CellError('#VALUE!')
+
+# B2 holds an error between two numbers
+_ERROR_RANGE = {'B1': 1, 'B2': '=1/0', 'B3': 2}
+_LOOKUP = {'B1': 1, 'B2': 2, 'B3': 3, 'C1': 'x', 'C2': 'y', 'C3': 'z'}
+
+
+# Every case's result is read from A1
+@pytest.mark.parametrize('cells, expected', [
+    # Precedence: negation binds tighter than ^, which is left-associative
+    ({'A1': '=-2^2'}, 4.0),
+    ({'A1': '=2^3^2'}, 64.0),
+    ({'A1': '=1+2*3-4/2'}, 5.0),
+    ({'A1': '=2*50%'}, 1.0),
+    ({'A1': '=1+2&"x"'}, '3x'),
+    ({'A1': '=1+1=2'}, True),
+    # Blank cells: "" to text, 0 to arithmetic, 0 when shown directly
+    ({'A1': '=IF(B1="",100,B1)'}, 100),
+    ({'A1': '=IF(B1="",100,B1)', 'B1': 7}, 7),
+    ({'A1': '=B1&"x"'}, 'x'),
+    ({'A1': '=B1+1'}, 1),
+    ({'A1': '=B1=0'}, True),
+    ({'A1': '=B1'}, 0),
+    ({'A1': '=SUM(B1,2)'}, 2.0),
+    # Conditions: only the text TRUE/FALSE is a logical value
+    ({'A1': '=IF("abc",1,2)'}, VALUE),
+    ({'A1': '=IF("true",1,2)'}, 1),
+    ({'A1': '=AND(B1:B2)', 'B1': True, 'B2': 'x'}, True),
+    # Errors propagate through dependents; IFERROR catches them
+    ({'A1': '=1/0'}, DIV0),
+    ({'A1': '=B1+1', 'B1': '=1/0'}, DIV0),
+    ({'A1': '=B1&"x"', 'B1': '=1/0'}, DIV0),
+    ({'A1': '=IF(B1>1,1,2)', 'B1': '=1/0'}, DIV0),
+    ({'A1': '=IFERROR(B1,5)', 'B1': '=1/0'}, 5),
+    ({'A1': '=IFERROR(SQRT(4),5)'}, 2.0),
+    ({'A1': '=SQRT(-1)'}, CellError('#NUM!')),
+    ({'A1': '=MATCH(9,B1:B2,0)', 'B1': 1, 'B2': 2}, CellError('#N/A')),
+    ({'A1': '="a"+1'}, VALUE),
+    # Errors inside ranges reach aggregates; COUNT skips them like Excel
+    ({'A1': '=SUM(B1:B3)', **_ERROR_RANGE}, DIV0),
+    ({'A1': '=MIN(B1:B3)', **_ERROR_RANGE}, DIV0),
+    ({'A1': '=MAX(B1:B3)', **_ERROR_RANGE}, DIV0),
+    ({'A1': '=AVERAGE(B1:B3)', **_ERROR_RANGE}, DIV0),
+    ({'A1': '=AND(B1:B3)', **_ERROR_RANGE}, DIV0),
+    ({'A1': '=COUNT(B1:B3)', **_ERROR_RANGE}, 2),
+    # Lookups
+    ({'A1': '=VLOOKUP(2.5,B1:C3,2)', **_LOOKUP}, 'y'),
+    ({'A1': '=INDEX(B1:B3,MATCH("Y",C1:C3,0))', **_LOOKUP}, 2),
+])
+def test_evaluates(cells, expected):
+    assert FormulaGraph(cells)['A1'] == expected
+
+
+@pytest.mark.parametrize('cells, sheet', [
+    ({'A1': '=SUMPRODUCT(B1:B2)'}, None),
+    ({'A1': '=Other!B1'}, None),
+    ({'A1': '=Other!B1'}, 'Sheet1'),
+])
+def test_rejects_unsupported(cells, sheet):
+    with pytest.raises(FormulaError, match='A1'):
+        FormulaGraph(cells, sheet)
+
+
+def test_same_sheet_reference():
+    assert FormulaGraph({'A1': '=Sheet1!B1+1', 'B1': 2}, 'Sheet1')['A1'] == 3
+
+
+def test_cycle_detected():
+    with pytest.raises(FormulaError, match='Circular reference'):
+        FormulaGraph({'A1': '=B1', 'B1': '=C1+1', 'C1': '=A1'})
+
+
+def test_set_recomputes_only_dependents():
+    graph = FormulaGraph({'A1': 1, 'B1': 10, 'A2': '=A1*2', 'A3': '=A2+1', 'B2': '=B1*2', 'C1': '=A3+B2'})
+    assert graph.set({'A1': 5}) == {'A2': 10, 'A3': 11, 'C1': 31}
+    assert graph.set({'B1': None}) == {'B2': 0, 'C1': 11}
+    assert graph['C1'] == 11
+
+
+def test_set_rejects_formula_cells():
+    graph = FormulaGraph({'A1': 1, 'A2': '=A1'})
+    with pytest.raises(FormulaError):
+        graph.set({'A2': 3})
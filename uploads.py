@@ -0,0 +1,31 @@
+"""Reading uploaded CSV/XLSX tables (line lists, pump curves)."""
+
+
+def read_table(file, name=None, label='File', error=ValueError):
+    """Read a CSV/XLSX into a DataFrame.
+
+    ``file`` may be a path or a file-like object (e.g. a Streamlit upload);
+    the format is picked from ``name`` or the file's own name. Other
+    formats, and files the reader can't parse (a corrupt or mislabelled
+    workbook, bad CSV), raise ``error`` naming the table as ``label``.
+    """
+    import pandas as pd
+
+    name = str(name or getattr(file, 'name', file)).lower()
+    if not name.endswith(('.xlsx', '.xlsm', '.csv')):
+        raise error(f'{label} must be a .csv or .xlsx file.')
+    try:
+        if name.endswith('.csv'):
+            return pd.read_csv(file)
+        return pd.read_excel(file, engine='openpyxl')
+    except Exception as exc:
+        raise error(f'Could not read {label.lower()}: {exc}') from exc
+
+
+def match_columns(raw, aliases):
+    """Header of ``raw`` matching each key of ``aliases`` (key -> accepted spellings), or ``None``.
+
+    Headers are compared stripped and lower-cased; spellings are tried in order.
+    """
+    headers = {str(c).strip().lower(): c for c in raw.columns}
+    return {key: next((headers[a] for a in spellings if a in headers), None) for key, spellings in aliases.items()}